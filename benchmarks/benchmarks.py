@@ -0,0 +1,109 @@
+"""Benchmarks of the hot paths of complex_function_validation.
+
+The benchmarks follow the conventions of airspeed velocity (asv):
+time_* methods of the benchmark classes are timed for each value of
+params after calling setup with the same value. Use `benchmarks/run.py`
+to run the benchmarks and to compare the results of two commits.
+"""
+
+import numpy
+
+import complex_function_validation as cfv
+from complex_function_validation.run import function_names
+
+sizes = [10, 100, 400]
+
+
+def _comparison(size):
+    samples = cfv.ComplexPlaneSampler(numpy.complex64)(size, size)
+    with numpy.errstate(all='ignore'):
+        reference = numpy.sqrt(samples.astype(numpy.complex128)).astype(numpy.complex64)
+        values = numpy.sqrt(samples)
+    return samples, reference, values
+
+
+class ComplexPlaneSampler:
+    params = sizes
+    param_names = ['size']
+
+    def setup(self, size):
+        self.sampler = cfv.ComplexPlaneSampler(numpy.complex64)
+
+    def time_call(self, size):
+        self.sampler(size, size)
+
+    def time_tiles(self, size):
+        for tile in self.sampler.tiles(size, size, 128):
+            pass
+
+
+class Compare:
+    params = sizes
+    param_names = ['size']
+
+    def setup(self, size):
+        self.samples, self.reference, self.values = _comparison(size)
+
+    def time_compare(self, size):
+        # time the element-wise compare on an interior block of finite
+        # samples, the edges of the plane are infinities
+        n = self.reference.shape[0]
+        block = slice(n // 4, 3 * n // 4)
+        for r, v in zip(self.reference[block, block].flat, self.values[block, block].flat):
+            cfv.compare(r, v)
+
+    def time_compare_arrays(self, size):
+        cfv.compare_arrays(self.reference, self.values)
+
+    def time_ulp_stats(self, size):
+        cfv.UlpStats().update(self.reference, self.values)
+
+    def time_insert_comparison(self, size):
+        cfv.ReportImage().insert_comparison(0, 0, self.reference.copy(), self.values, self.samples)
+
+
+class Clustering:
+    params = sizes
+    param_names = ['size']
+
+    def setup(self, size):
+        rng = numpy.random.default_rng(0)
+        self.mask = rng.random((2 * size + 3, 2 * size + 3)) < 0.3
+        self.labels = cfv.connected_components(self.mask)
+        self.image = numpy.where(self.mask, b'x', b'=').astype('S1')
+
+    def time_connected_components(self, size):
+        cfv.connected_components(self.mask)
+
+    def time_component_center_points(self, size):
+        cfv.component_center_points(self.labels)
+
+    def time_get_sample_indices(self, size):
+        cfv.ReportImage().get_sample_indices(self.image, 'x')
+
+
+class MPMathFunction:
+    params = [function_names, [5, 20]]
+    param_names = ['function', 'size']
+
+    def setup(self, name, size):
+        self.function = cfv.MPMathFunction(name, 'complex128')
+        self.samples = cfv.ComplexPlaneSampler(numpy.complex128)(size, size)
+
+    def time_call(self, name, size):
+        self.function(self.samples)
+
+
+class ReportImage:
+    params = sizes
+    param_names = ['size']
+
+    def setup(self, size):
+        ref = cfv.NumpyFunction('sqrt', 'complex128')
+        f = cfv.NumpyFunction('sqrt', 'complex64')
+        self.image = cfv.ReportImage()
+        with numpy.errstate(all='ignore'):
+            self.image.generate_report(ref, [f], size_re=size, size_im=size)
+
+    def time_tostring(self, size):
+        self.image.tostring()
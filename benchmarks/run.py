@@ -0,0 +1,115 @@
+"""Run benchmarks and compare benchmark results.
+
+Usage:
+
+  python -m benchmarks.run [<pattern>]
+  python -m benchmarks.run compare <old.json> <new.json> [<factor>]
+
+The first form runs the benchmarks whose names contain pattern and
+stores the results in benchmarks/results/<commit>.json, updating the
+existing results of the commit. The second form reports the
+benchmarks that became slower by more than factor (default is 1.1)
+and exits with status 1 when there are such regressions.
+"""
+
+import os
+import sys
+import json
+import time
+import timeit
+import inspect
+import itertools
+import subprocess
+
+import numpy
+
+from . import benchmarks
+
+results_dir = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(__file__),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def iter_benchmarks(pattern=''):
+    """Generate (name, setup, func, params) of benchmarks.
+    """
+    for cls_name, cls in inspect.getmembers(benchmarks, inspect.isclass):
+        if cls.__module__ != benchmarks.__name__:
+            continue
+        params = getattr(cls, 'params', [])
+        if params and not isinstance(params[0], list):
+            params = [params]
+        for method_name in sorted(dir(cls)):
+            if not method_name.startswith('time_'):
+                continue
+            for args in itertools.product(*params):
+                name = f'{cls_name}.{method_name}({", ".join(map(str, args))})'
+                if pattern not in name:
+                    continue
+                instance = cls()
+                yield name, getattr(instance, 'setup', None), getattr(instance, method_name), args
+
+
+def measure(func, args, repeat=5):
+    """Return the median time of func(*args) in seconds.
+    """
+    timer = timeit.Timer(lambda: func(*args))
+    number, _ = timer.autorange()
+    return float(numpy.median(timer.repeat(repeat=repeat, number=number))) / number
+
+
+def run(pattern=''):
+    results = {}
+    for name, setup, func, args in iter_benchmarks(pattern):
+        if setup is not None:
+            setup(*args)
+        results[name] = measure(func, args)
+        print(f'{name}: {results[name] * 1e3:.4g} ms')
+    return dict(commit=git_commit(), date=time.strftime('%Y-%m-%d %H:%M:%S'),
+                numpy=numpy.__version__, results=results)
+
+
+def compare(old, new, factor=1.1):
+    """Return a list of (name, old time, new time) of benchmarks that
+    are slower by more than factor in new results.
+    """
+    regressions = []
+    for name, new_time in new['results'].items():
+        old_time = old['results'].get(name)
+        if old_time is None:
+            continue
+        ratio = new_time / old_time
+        print(f'{ratio:7.2f} {old_time * 1e3:10.4g} ms {new_time * 1e3:10.4g} ms  {name}')
+        if ratio > factor:
+            regressions.append((name, old_time, new_time))
+    return regressions
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['compare']:
+        with open(sys.argv[2]) as fd:
+            old = json.load(fd)
+        with open(sys.argv[3]) as fd:
+            new = json.load(fd)
+        regressions = compare(old, new, *map(float, sys.argv[4:5]))
+        print(f'{len(regressions)} regressions from {old["commit"]} to {new["commit"]}')
+        sys.exit(1 if regressions else 0)
+
+    import warnings
+    warnings.simplefilter('ignore')
+    result = run(*sys.argv[1:2])
+    os.makedirs(results_dir, exist_ok=True)
+    fn = os.path.join(results_dir, f'{result["commit"]}.json')
+    if os.path.exists(fn):
+        # keep the results of benchmarks that were not run
+        with open(fn) as fd:
+            result['results'] = dict(json.load(fd)['results'], **result['results'])
+    with open(fn, 'w') as fd:
+        json.dump(result, fd, indent=1)
+    print(f'Created {fn}')
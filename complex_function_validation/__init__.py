@@ -1,18 +1,78 @@
 """Complex function validation tool.
 """
 
+import re as re_module
 import numpy
+import functools
 import contextlib
 import importlib
 
+from . import backends
+from . import benchmark
+from . import profiling
 from . import special_cases
+from . import store
+from .cache import ReferenceCache, EvaluationMemo
 
 class ComplexPlaneSampler:
     """A sample array covering a complex plane for the given numpy dtype.
+
+    When nested is True, the finite points of an axis with size n are
+    a subset of the axis points with size k * (n - 1) + 1 for any
+    positive integer k. For instance, the grid of size 41 is a subgrid
+    of the grid of size 201, see `subgrid_indices`.
     """
-    def __init__(self, dtype):
+    def __init__(self, dtype, nested=False):
         self.dtype = dtype
         self.finfo = numpy.finfo(dtype)
+        self.nested = nested
+
+    def axis(self, size):
+        """Return 1-D array of 3 + 2 * size axis points.
+        """
+        axis_points = numpy.zeros(3 + 2 * size, dtype=self.finfo.dtype)
+
+        logmin = numpy.log10(abs(self.finfo.min))
+        logtiny = numpy.log10(self.finfo.tiny)
+        logmax = numpy.log10(self.finfo.max)
+
+        if self.nested:
+            # Use Python floats so that the same points are computed
+            # identically for all sizes.
+            logtiny, logmax = float(logtiny), float(logmax)
+            points = [10 ** (logtiny + (logmax - logtiny) * (i / (size - 1))) for i in range(size - 1)]
+            points = numpy.array(points + [self.finfo.max] * min(size, 1), dtype=self.finfo.dtype)
+            axis_points[1:size+1] = -points[::-1]
+            axis_points[-size-1:-1] = points
+        else:
+            axis_points[1:size+1] = -numpy.logspace(logmin, logtiny, size, dtype=self.finfo.dtype)
+            axis_points[-size-1:-1] = numpy.logspace(logtiny, logmax, size, dtype=self.finfo.dtype)
+        if size > 1:
+            axis_points[1] = self.finfo.min
+            axis_points[-2] = self.finfo.max
+        if size > 0:
+            axis_points[size] = -self.finfo.tiny
+            axis_points[-size-1] = self.finfo.tiny
+        axis_points[0] = -numpy.inf
+        axis_points[-1] = numpy.inf
+        return axis_points
+
+    @staticmethod
+    def subgrid_indices(size, fine_size):
+        """Return indices of nested axis points with size within the
+        nested axis points with fine_size.
+        """
+        if size > 1:
+            if fine_size < size or (fine_size - 1) % (size - 1):
+                raise ValueError(f'axis with size {size} is not a subgrid of axis with size {fine_size}')
+            step = (fine_size - 1) // (size - 1)
+        elif size > fine_size:
+            raise ValueError(f'axis with size {size} is not a subgrid of axis with size {fine_size}')
+        else:
+            step = 1
+        positive = step * numpy.arange(size)
+        negative = fine_size - 1 - positive[::-1]
+        return numpy.concatenate(([0], 1 + negative, [fine_size + 1], fine_size + 2 + positive, [2 * fine_size + 2]))
 
     def __call__(self, size_re, size_im):
         """Return a 2-D array of complex numbers that covers the complex plane
@@ -35,34 +95,8 @@ class ComplexPlaneSampler:
          [-inf+3.4028235e+38j   0.+3.4028235e+38j  inf+3.4028235e+38j]
          [-inf          +infj   0.          +infj  inf          +infj]]
         """
-        real_axis_points = numpy.zeros(3 + 2 * size_re, dtype=self.finfo.dtype)
-        imag_axis_points = numpy.zeros(3 + 2 * size_im, dtype=self.finfo.dtype)
-
-        logmin = numpy.log10(abs(self.finfo.min))
-        logtiny = numpy.log10(self.finfo.tiny)
-        logmax = numpy.log10(self.finfo.max)
-
-        real_axis_points[1:size_re+1] = -numpy.logspace(logmin, logtiny, size_re, dtype=self.finfo.dtype)
-        real_axis_points[-size_re-1:-1] = numpy.logspace(logtiny, logmax, size_re, dtype=self.finfo.dtype)
-        if size_re > 1:
-            real_axis_points[1] = self.finfo.min
-            real_axis_points[-2] = self.finfo.max
-        if size_re > 0:
-            real_axis_points[size_re] = -self.finfo.tiny
-            real_axis_points[-size_re-1] = self.finfo.tiny
-        real_axis_points[0] = -numpy.inf
-        real_axis_points[-1] = numpy.inf
-
-        imag_axis_points[1:size_im+1] = -numpy.logspace(logmin, logtiny, size_im, dtype=self.finfo.dtype)
-        imag_axis_points[-size_im-1:-1] = numpy.logspace(logtiny, logmax, size_im, dtype=self.finfo.dtype)
-        if size_im > 1:
-            imag_axis_points[1] = self.finfo.min
-            imag_axis_points[-2] = self.finfo.max
-        if size_im > 0:
-            imag_axis_points[size_im] = -self.finfo.tiny
-            imag_axis_points[-size_im-1] = self.finfo.tiny
-        imag_axis_points[0] = -numpy.inf
-        imag_axis_points[-1] = numpy.inf
+        real_axis_points = self.axis(size_re)
+        imag_axis_points = self.axis(size_im)
 
         real_part = real_axis_points.reshape((-1, 3 + 2 * size_re)).repeat(3 + 2 * size_im, 0).astype(self.dtype)
 
@@ -72,6 +106,54 @@ class ComplexPlaneSampler:
 
         return real_part + imag_part
 
+    def tiles(self, size_re, size_im, tile_size):
+        """Generate tiles of the sample array `self(size_re, size_im)`.
+
+        Yields (rows, cols, samples) where rows and cols are slices of
+        the sample array and samples is a 2-D array of at most
+        tile_size x tile_size samples. The sample array itself is
+        never created.
+        """
+        real_axis_points = self.axis(size_re)
+        imag_axis_points = self.axis(size_im)
+        for i in range(0, imag_axis_points.size, tile_size):
+            rows = slice(i, min(i + tile_size, imag_axis_points.size))
+            for j in range(0, real_axis_points.size, tile_size):
+                cols = slice(j, min(j + tile_size, real_axis_points.size))
+                with profiling.phase('sampling'):
+                    samples = numpy.empty((rows.stop - rows.start, cols.stop - cols.start), dtype=self.dtype)
+                    samples.real[:] = real_axis_points[cols]
+                    samples.imag[:] = imag_axis_points[rows, None]
+                yield rows, cols, samples
+
+
+def downsample_indices(size, map_size):
+    """Return indices of map axis points with map_size for the axis
+    points with size, see `ComplexPlaneSampler.axis`.
+
+    Infinities and zero are mapped to themselves, negative and
+    positive points are mapped to map_size blocks of consecutive
+    points. The blocks of negative points mirror the blocks of
+    positive points.
+    """
+    indices = numpy.arange(size) * map_size // max(size, 1)
+    return numpy.concatenate(([0], map_size - indices[::-1], [map_size + 1], map_size + 2 + indices,
+                              [2 * map_size + 2]))
+
+
+def downsample_labels(map_indices):
+    """Return indices of axis points that label map axis points, see
+    `downsample_indices`.
+
+    A map point is labeled by the point of its block that is closest
+    to zero so that the labels of negative and positive map points
+    mirror each other.
+    """
+    first = numpy.unique(map_indices, return_index=True)[1]
+    last = map_indices.size - 1 - numpy.unique(map_indices[::-1], return_index=True)[1]
+    zero = first.size // 2
+    return numpy.concatenate((last[:zero], first[zero:]))
+
 
 def compare_legend():
     return {
@@ -90,24 +172,36 @@ def compare_legend():
 def ftz(value):
     """Flush subnormals to zero.
     """
-    tiny = numpy.finfo(value.dtype).tiny
-    if value.dtype.kind == 'c':
-        float_dtype = {8: numpy.float32, 16: numpy.float64, 32: numpy.float128}[value.dtype.itemsize]
-        view = value.reshape((1,)).view(float_dtype)
-        re = view[0]
-        im = view[1]
-        if numpy.isfinite(re) and re != 0 and abs(re) < tiny:
-            view[0] *= 0
-        if numpy.isfinite(im) and im != 0 and abs(im) < tiny:
-            view[1] *= 0
-        return view.view(value.dtype)[0]
-    assert value.dtype.kind == 'f', value.dtype
-    float_dtype = {4: numpy.float32, 8: numpy.float64, 16: numpy.float128}[value.dtype.itemsize]
-    view = value.reshape((1,)).view(float_dtype)
-    re = view[0]
-    if numpy.isfinite(re) and re != 0 and abs(re) < tiny:
-        view[0] *= 0
-    return view.view(value.dtype)[0]
+    return ftz_array(numpy.array(value))[()]
+
+
+def ftz_array(array):
+    """Flush subnormals of a real or complex array to zero in-place.
+
+    Returns the input array. The signs of flushed values are
+    preserved. Use ``ftz_array(samples.copy())`` to model devices
+    that treat subnormal inputs as zeros (DAZ).
+    """
+    for part in _components(array):
+        finfo = numpy.finfo(part.dtype)
+        uint_dtype = {2: numpy.uint16, 4: numpy.uint32, 8: numpy.uint64}.get(part.dtype.itemsize)
+        if uint_dtype is None:
+            # extended precision floats have padding bits
+            with numpy.errstate(invalid='ignore'):
+                numpy.multiply(part, 0, out=part, where=abs(part) < finfo.tiny)
+            continue
+        bits = part.view(uint_dtype)
+        exponent_mask = uint_dtype(((1 << finfo.nexp) - 1) << finfo.nmant)
+        sign_mask = uint_dtype(1 << (8 * part.dtype.itemsize - 1))
+        numpy.bitwise_and(bits, sign_mask, out=bits, where=(bits & exponent_mask) == 0)
+    return array
+
+
+def _components(array):
+    if array.dtype.kind == 'c':
+        return array.real, array.imag
+    return array,
+
 
 def compare(reference, value):
     """Return a string code that describes how value compares to
@@ -149,6 +243,182 @@ def compare(reference, value):
         return 'M'
 
 
+def compare_arrays(reference, values):
+    """Return an uint8 array of codes (as in `compare`) that describe
+    how values compare to reference values elementwise.
+
+    Both reference and values must have the same dtype and shape. Use
+    `codes.view('S1')` to get the codes as characters.
+    """
+    reference = numpy.asarray(reference)
+    values = numpy.asarray(values)
+    assert reference.dtype == values.dtype, (reference.dtype, values.dtype)
+    assert reference.shape == values.shape, (reference.shape, values.shape)
+    finfo = numpy.finfo(values.dtype)
+    codes = numpy.full(reference.shape, ord('X'), dtype=numpy.uint8)
+
+    ref_finite = numpy.isfinite(reference)
+    ref_inf = numpy.isinf(reference)
+    ref_nan = ~(ref_finite | ref_inf)
+    value_finite = numpy.isfinite(values)
+    value_inf = numpy.isinf(values)
+    value_nan = numpy.isnan(values)
+
+    mask = ref_finite & value_finite
+    if mask.any():
+        r, v = reference[mask], values[mask]
+        with numpy.errstate(all='ignore'):
+            diff = abs(r - v)
+            norm = numpy.maximum(abs(r), abs(v))
+            n = numpy.round(numpy.log10(diff / norm / finfo.eps))
+        c = numpy.full(r.shape, ord('X'), dtype=numpy.uint8)
+        digits = (n >= 0) & (n < finfo.precision)
+        c[digits] = numpy.frombuffer(b'123456789ABCDEF', dtype=numpy.uint8)[n[digits].astype(numpy.intp)]
+        c[n == finfo.precision] = ord('x')
+        c[diff < finfo.eps * norm] = ord('c')
+        c[r == v] = ord('=')
+        codes[mask] = c
+
+    codes[ref_finite & value_inf] = ord('I')
+    codes[ref_finite & value_nan & ~value_inf] = ord('N')
+
+    # non-finite values are of the same kind when these are equal or
+    # have the same string representation, say, (inf+nanj)
+    same_kind = numpy.ones(reference.shape, dtype=bool)
+    for r, v in zip(_components(reference), _components(values)):
+        same_kind &= (r == v) | (numpy.isnan(r) & numpy.isnan(v))
+    codes[ref_inf & value_nan] = ord('N')
+    codes[ref_inf & same_kind] = ord('~')
+
+    codes[ref_nan & value_nan] = ord('~')
+    codes[ref_nan & ~value_nan] = ord('M')
+    return codes
+
+
+def ulp_distance(reference, values):
+    """Return an uint64 array of distances between reference values
+    and values in units of least precision (ULP), that is, the number
+    of floating-point numbers between the values plus one.
+
+    Both reference and values must be real arrays with the same dtype.
+    Zeros with different signs are equal, non-finite values of the
+    same kind have zero distance, otherwise, the distance to a
+    non-finite value is `ulp_invalid`.
+    """
+    reference = numpy.asarray(reference)
+    values = numpy.asarray(values)
+    assert reference.dtype == values.dtype and reference.dtype.kind == 'f', (reference.dtype, values.dtype)
+    uint_dtype = numpy.dtype(f'u{reference.dtype.itemsize}').type
+    sign = uint_dtype(1 << (8 * reference.dtype.itemsize - 1))
+
+    def ordinal(x):
+        # map floating-point numbers to monotonically increasing
+        # unsigned integers so that -0 and +0 are mapped to sign
+        bits = x.view(uint_dtype)
+        magnitude = bits & (sign - uint_dtype(1))
+        return numpy.where(bits & sign, sign - magnitude, sign + magnitude)
+
+    a, b = ordinal(reference), ordinal(values)
+    distance = (numpy.maximum(a, b) - numpy.minimum(a, b)).astype(numpy.uint64)
+    nonfinite = ~(numpy.isfinite(reference) & numpy.isfinite(values))
+    same_kind = (reference == values) | (numpy.isnan(reference) & numpy.isnan(values))
+    distance[nonfinite] = numpy.where(same_kind[nonfinite], 0, ulp_invalid)
+    return distance
+
+
+ulp_invalid = numpy.iinfo(numpy.uint64).max
+_powers_of_two = numpy.uint64(1) << numpy.arange(64, dtype=numpy.uint64)
+
+
+class UlpStats:
+    """Statistics of ULP distances, see `ulp_distance`.
+
+    The distance of complex values is the maximal distance of the real
+    and imaginary parts. Distances are accumulated into a histogram
+    where bin k counts the distances with bit length k, that is, bin 0
+    counts zero distances and bin k > 0 counts distances in [2 ** (k -
+    1), 2 ** k). Percentiles are upper bounds taken from histogram
+    bins. Samples with invalid distances are counted separately.
+    """
+
+    percentiles = (50, 90, 99)
+
+    def __init__(self):
+        self.count = 0
+        self.invalid = 0
+        self.total = 0
+        self.max = 0
+        self.histogram = numpy.zeros(65, dtype=numpy.int64)
+
+    def __repr__(self):
+        return f'{type(self).__name__}(count={self.count}, max={self.max})'
+
+    def update(self, reference, values):
+        distance = None
+        for r, v in zip(_components(numpy.asarray(reference)), _components(numpy.asarray(values))):
+            d = ulp_distance(r, v).ravel()
+            distance = d if distance is None else numpy.maximum(distance, d)
+        invalid = distance == ulp_invalid
+        self.invalid += int(invalid.sum())
+        distance = distance[~invalid]
+        if distance.size == 0:
+            return self
+        self.count += distance.size
+        self.max = max(self.max, int(distance.max()))
+        # exact sum without overflow
+        self.total += (int((distance >> numpy.uint64(32)).sum()) << 32) + int((distance & numpy.uint64(0xffffffff)).sum())
+        self.histogram += numpy.bincount(numpy.searchsorted(_powers_of_two, distance, side='right'), minlength=65)
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.invalid += other.invalid
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.histogram += other.histogram
+        return self
+
+    def dump(self):
+        return dict(count=self.count, invalid=self.invalid, total=self.total, max=self.max,
+                    histogram=self.histogram.tolist())
+
+    @classmethod
+    def load(cls, state):
+        ulp_stats = cls()
+        ulp_stats.count, ulp_stats.invalid, ulp_stats.total, ulp_stats.max = (
+            state['count'], state['invalid'], state['total'], state['max'])
+        ulp_stats.histogram[:] = state['histogram']
+        return ulp_stats
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        if not self.count:
+            return 0
+        k = int(numpy.searchsorted(numpy.cumsum(self.histogram), q / 100 * self.count))
+        return min((1 << k) - 1, self.max)
+
+    def as_dict(self):
+        """Return statistics as a dictionary with keys ulp_max,
+        ulp_mean, ulp_p<q> for q in percentiles, ulp_invalid, and
+        ulp_histogram.
+        """
+        d = dict(ulp_max=self.max, ulp_mean=self.mean)
+        for q in self.percentiles:
+            d[f'ulp_p{q}'] = self.percentile(q)
+        d.update(ulp_invalid=self.invalid,
+                 ulp_histogram=self.histogram[:int(numpy.flatnonzero(self.histogram).max(initial=0)) + 1].tolist())
+        return d
+
+
+# Codes ordered by severity, used for downsampling code maps:
+_ranked_codes = numpy.frombuffer(b'=c~123456789ABCDEFxXINM', dtype=numpy.uint8)
+_code_ranks = numpy.zeros(256, dtype=numpy.int8)
+_code_ranks[_ranked_codes] = numpy.arange(len(_ranked_codes))
+
+
 def valuetostr(value):
     f = numpy.finfo(value.dtype)
     if numpy.isnan(value): return 'nan'
@@ -166,19 +436,37 @@ class ReportImage:
     """A helper class for visualizing function comparisons on text-terminal.
     """
     def __init__(self, height=0, width=0):
-        self.image = numpy.full((height, width), b' ', dtype='c')
+        # image is a view of canvas that grows geometrically so that
+        # the amortized cost of inserting content is linear
+        self._canvas = numpy.full((height, width), b' ', dtype='c')
+        self.image = self._canvas
+        # the sequence of text and comparison insertions for rendering
+        # the image from dumps, see `dump` and `load`
+        self._display = []
         self.stats = []
+        self.ulp_stats = []
         self.image_slices = []
         self.reference_and_values = []
         self.unsaved_stats = []
+        self.unsaved_ulp_stats = []
         self.unsaved_image_slices = []
         self.unsaved_reference_and_values = []
 
     def _ensure_index(self, row, col):
-        if row >= self.image.shape[0]:
-            self.image = numpy.vstack((self.image, numpy.full((row - self.image.shape[0] + 1, self.image.shape[1]), ' ', dtype=self.image.dtype)))
-        if col >= self.image.shape[1]:
-            self.image = numpy.hstack((self.image, numpy.full((self.image.shape[0], col - self.image.shape[1] + 1), ' ', dtype=self.image.dtype)))
+        height, width = self.image.shape
+        if row < height and col < width:
+            return
+        height, width = max(height, row + 1), max(width, col + 1)
+        canvas_height, canvas_width = self._canvas.shape
+        if height > canvas_height or width > canvas_width:
+            if height > canvas_height:
+                canvas_height = max(height, 2 * canvas_height)
+            if width > canvas_width:
+                canvas_width = max(width, 2 * canvas_width)
+            canvas = numpy.full((canvas_height, canvas_width), b' ', dtype=self._canvas.dtype)
+            canvas[:self.image.shape[0], :self.image.shape[1]] = self.image
+            self._canvas = canvas
+        self.image = self._canvas[:height, :width]
 
     def _fix_indices(self, row, col):
         if row < 0:
@@ -191,27 +479,94 @@ class ReportImage:
         row, col = self._fix_indices(row, col)
         self._ensure_index(row + subimage.shape[0], col + subimage.shape[1])
         self.image[row:row+subimage.shape[0], col:col+subimage.shape[1]] = subimage
+        for i, line in enumerate(subimage):
+            self._display.append(['text', row + i, col, line.tobytes().decode()])
 
     def insert_comparison(self, row, col, reference, values, inputs, save=True, apply_ftz=False):
-        from collections import defaultdict
         row, col = self._fix_indices(row, col)
         self._ensure_index(row + reference.shape[0], col + reference.shape[1])
+        with profiling.phase('comparison'):
+            if apply_ftz:
+                ftz_array(reference)
+            codes = compare_arrays(reference, values)
+            self._save_comparison(row, col, codes, numpy.bincount(codes.ravel(), minlength=256),
+                                  UlpStats().update(reference, values), reference, values, inputs, save=save)
+
+    def _save_comparison(self, row, col, codes, counts, ulp_stats, reference, values, inputs, save=True):
+        from collections import defaultdict
+        self.image[row:row + reference.shape[0], col:col + reference.shape[1]] = codes.view('S1')
         stats = defaultdict(int)
-        for i in range(reference.shape[0]):
-            for j in range(reference.shape[1]):
-                if apply_ftz:
-                    reference[i, j] = ftz(reference[i, j])
-                c = compare(reference[i, j], values[i, j])
-                self.image[row + i, col + j] = c
-                stats[c] += 1
+        for c in numpy.flatnonzero(counts):
+            stats[chr(c)] = int(counts[c])
         if save:
             self.image_slices.append((slice(row, row + reference.shape[0]), slice(col, col + reference.shape[1])))
             self.reference_and_values.append((reference, values, inputs))
             self.stats.append(stats)
+            self.ulp_stats.append(ulp_stats)
         else:
             self.unsaved_image_slices.append((slice(row, row + reference.shape[0]), slice(col, col + reference.shape[1])))
             self.unsaved_reference_and_values.append((reference, values, inputs))
             self.unsaved_stats.append(stats)
+            self.unsaved_ulp_stats.append(ulp_stats)
+        self._display.append(['comparison', save, len(self.stats if save else self.unsaved_stats) - 1])
+
+    def insert_tiled_comparison(self, row, col, ref, function, sampler, size_re, size_im, tile_size, map_size,
+                                apply_daz=False, apply_ftz=False):
+        """Insert a downsampled comparison map of reference and function
+        values on the samples grid that is evaluated tile by tile.
+
+        A map cell shows the most severe code of the samples in the
+        cell, and the inputs and values of the corresponding sample
+        are saved for `get_samples`. Statistics are collected over all
+        samples. Return map axis points as a 2-D samples array.
+        """
+        row, col = self._fix_indices(row, col)
+        map_re, map_im = min(size_re, map_size), min(size_im, map_size)
+        rows_map = downsample_indices(size_im, map_im)
+        cols_map = downsample_indices(size_re, map_re)
+        shape = (2 * map_im + 3, 2 * map_re + 3)
+        self._ensure_index(row + shape[0], col + shape[1])
+
+        ranks = numpy.full(shape, -1, dtype=numpy.int8)
+        reference = numpy.zeros(shape, dtype=function.numpy_dtype)
+        values = numpy.zeros(shape, dtype=function.numpy_dtype)
+        inputs = numpy.zeros(shape, dtype=sampler.dtype)
+        counts = numpy.zeros(256, dtype=numpy.int64)
+        ulp_stats = UlpStats()
+        for rows, cols, np_samples in sampler.tiles(size_re, size_im, tile_size):
+            with profiling.phase('reference evaluate'):
+                np_ref_values = ref.evaluate(ftz_array(np_samples.copy()) if apply_daz else np_samples, function.numpy_dtype)
+            if apply_ftz:
+                np_ref_values = ftz_array(np_ref_values.copy())
+            with profiling.phase('target evaluate'):
+                np_values = function.evaluate(np_samples, function.numpy_dtype)
+            with profiling.phase('comparison'):
+                codes = compare_arrays(np_ref_values, np_values).ravel()
+                counts += numpy.bincount(codes, minlength=256)
+                ulp_stats.update(np_ref_values, np_values)
+
+                # find the sample with the most severe code in each map cell
+                cells = (rows_map[rows][:, None] * shape[1] + cols_map[cols]).ravel()
+                tile_ranks = _code_ranks[codes]
+                order = numpy.lexsort((tile_ranks, cells))
+                worst = order[numpy.flatnonzero(numpy.diff(cells[order], append=-1))]
+                worst = worst[tile_ranks[worst] > ranks.flat[cells[worst]]]
+                index = cells[worst]
+                ranks.flat[index] = tile_ranks[worst]
+                reference.flat[index] = np_ref_values.flat[worst]
+                values.flat[index] = np_values.flat[worst]
+                inputs.flat[index] = np_samples.flat[worst]
+
+        with profiling.phase('comparison'):
+            codes = _ranked_codes[ranks[::-1]]
+            self._save_comparison(row, col, codes, counts, ulp_stats, reference[::-1], values[::-1], inputs[::-1])
+
+        real_axis_points = sampler.axis(size_re)[downsample_labels(cols_map)]
+        imag_axis_points = sampler.axis(size_im)[downsample_labels(rows_map)]
+        axis_samples = numpy.empty(shape, dtype=sampler.dtype)
+        axis_samples.real[:] = real_axis_points
+        axis_samples.imag[:] = imag_axis_points[:, None]
+        return axis_samples
 
     def insert_imag_axis(self, row, col, samples):
         for i in range(samples.shape[0]):
@@ -253,11 +608,13 @@ class ReportImage:
         elif align == 'left':
             self._ensure_index(row, col + len(text) - 1)
             self.image[row, col:col + len(text)] = text
+            self._display.append(['text', row, col, text])
         elif align == 'right':
             self._ensure_index(row, col)
             if len(text) > col:
                 text = text[-col:]
             self.image[row, col - len(text): col] = text
+            self._display.append(['text', row, col - len(text), text])
         else:
             raise NotImplementedError(aligh)
 
@@ -274,25 +631,90 @@ class ReportImage:
         self.insert_text(row, col, char * self.image.shape[1])
             
     def tostring(self):
-        lst = []
-        for row in self.image:
-            lst.append((b''.join(row)).decode().rstrip())
-        return '\n'.join(lst)
+        with profiling.phase('rendering'):
+            lst = []
+            for row in self.image:
+                lst.append(row.tobytes().decode().rstrip())
+            return '\n'.join(lst)
 
     def __str__(self):
         return self.tostring()
 
+    def dump(self, values=True):
+        """Return a JSON serializable state and a dictionary of arrays
+        that define the image, see `load`.
+
+        The arrays contain comparison codes as uint8 arrays and, when
+        values is True, the reference values, values, and inputs of
+        comparisons.
+        """
+        state = dict(shape=list(self.image.shape), display=self._display, values=values)
+        arrays = {}
+        for saved, slices, stats, ulp_stats, data in [
+                (True, self.image_slices, self.stats, self.ulp_stats, self.reference_and_values),
+                (False, self.unsaved_image_slices, self.unsaved_stats, self.unsaved_ulp_stats,
+                 self.unsaved_reference_and_values)]:
+            kind = 'saved' if saved else 'unsaved'
+            comparisons = []
+            for k, (rows, cols) in enumerate(slices):
+                arrays[f'{kind}_codes_{k}'] = self.image[rows, cols].view(numpy.uint8)
+                if values:
+                    for name, array in zip(['reference', 'values', 'inputs'], data[k]):
+                        arrays[f'{kind}_{name}_{k}'] = array
+                comparisons.append(dict(slices=[rows.start, rows.stop, cols.start, cols.stop],
+                                        stats=dict(stats[k]), ulp_stats=ulp_stats[k].dump()))
+            state[kind] = comparisons
+        return state, arrays
+
+    @classmethod
+    def load(cls, state, arrays):
+        """Return an image from the state and arrays returned by `dump`.
+        """
+        from collections import defaultdict
+        image = cls(*state['shape'])
+        image._display = state['display']
+        for saved in [True, False]:
+            kind = 'saved' if saved else 'unsaved'
+            for k, comparison in enumerate(state[kind]):
+                r0, r1, c0, c1 = comparison['slices']
+                if state['values']:
+                    data = tuple(arrays[f'{kind}_{name}_{k}'] for name in ['reference', 'values', 'inputs'])
+                else:
+                    data = None
+                if saved:
+                    image.image_slices.append((slice(r0, r1), slice(c0, c1)))
+                    image.stats.append(defaultdict(int, comparison['stats']))
+                    image.ulp_stats.append(UlpStats.load(comparison['ulp_stats']))
+                    image.reference_and_values.append(data)
+                else:
+                    image.unsaved_image_slices.append((slice(r0, r1), slice(c0, c1)))
+                    image.unsaved_stats.append(defaultdict(int, comparison['stats']))
+                    image.unsaved_ulp_stats.append(UlpStats.load(comparison['ulp_stats']))
+                    image.unsaved_reference_and_values.append(data)
+        for op in image._display:
+            if op[0] == 'text':
+                _, row, col, text = op
+                image.image[row, col:col + len(text)] = text
+            else:
+                _, saved, k = op
+                kind = 'saved' if saved else 'unsaved'
+                rows, cols = (image.image_slices if saved else image.unsaved_image_slices)[k]
+                image.image[rows, cols] = arrays[f'{kind}_codes_{k}'].view('S1')
+        return image
+
     def get_stats(self):
         results = []
-        for stats in self.stats:
+        for stats, ulp_stats in zip(self.stats, self.ulp_stats):
             inaccuracies = sum(stats[n] for n in '123456789ABCDEF')
             mismatches = stats['x'] + stats['X'] + stats['N'] + stats['I'] + stats['M']
             matches = stats["="] + stats["c"] + stats["~"]
             total = inaccuracies + mismatches + matches
-            results.append(dict(matches=matches, inaccuracies=inaccuracies, mismatches=mismatches, total=total))
+            results.append(dict(matches=matches, inaccuracies=inaccuracies, mismatches=mismatches, total=total,
+                                **ulp_stats.as_dict()))
         return results
 
-    def stats_summary(self, stats):
+    @staticmethod
+    def stats_summary(stats):
         lines = []
         inaccuracies = sum(stats[n] for n in '123456789ABCDEF')
         mismatches = stats['x'] + stats['X'] + stats['N'] + stats['I'] + stats['M']
@@ -305,42 +727,78 @@ class ReportImage:
             lines.append(f'mismatch rate: {100 * mismatches / total:3.1f}%')
         return '\n'.join(lines)
 
-    def generate_report(self, ref, functions, size_re=None, size_im=None):
+    def generate_report(self, ref, functions, size_re=None, size_im=None, memo=None, nested=False,
+                        tile_size=None, map_size=None):
         """Generate a comparision report of reference and given functions.
 
         Parameters
         ----------
         ref: Function
         functions: a sequence of Function instances
+        memo: EvaluationMemo instance used for reference and function values
+        nested: when True, use nested samples so that reports on
+          subgrids of memoized grids require no function evaluations
+        tile_size: when specified, the samples grid is generated,
+          evaluated, and compared in tiles with tile_size x tile_size
+          samples so that memory usage is bounded by the tile size,
+          see `insert_tiled_comparison`. The memo is used only for
+          the real line.
+        map_size: the size of downsampled comparison map when
+          tile_size is specified, defaults to 50
         """
         if size_re is None:
             size_re = 50
         if size_im is None:
             size_im = size_re
+        if map_size is None:
+            map_size = 50
 
         imag_axis_width = 10
-        map_height, map_width = 2*size_im + 3, 2*size_re + 3
+        if tile_size is None:
+            map_height, map_width = 2*size_im + 3, 2*size_re + 3
+        else:
+            map_height, map_width = 2*min(size_im, map_size) + 3, 2*min(size_re, map_size) + 3
         voffset = 1
         stats_list = []
         for index, f in enumerate(functions):
             apply_ftz = f.apply_ftz(f._device)
-            np_samples = ComplexPlaneSampler(f.numpy_dtype)(size_re, size_im)
-            np_samples_real = np_samples.real[size_im + 1:size_im + 2]
+            apply_daz = f.apply_daz(f._device)
+            sampler = ComplexPlaneSampler(f.numpy_dtype, nested=nested)
+            hoffset = index * (imag_axis_width + map_width + 2)
 
-            np_ref_values = ref.evaluate(np_samples, f.numpy_dtype)
-            np_ref_values_real = ref.evaluate(np_samples_real, f.numpy_real_dtype)
+            if tile_size is None:
+                with profiling.phase('sampling'):
+                    np_samples = sampler(size_re, size_im)
+                np_samples_real = np_samples.real[size_im + 1:size_im + 2]
+                with profiling.phase('reference evaluate'):
+                    if apply_daz:
+                        np_ref_values = ref.evaluate(ftz_array(np_samples.copy()), f.numpy_dtype, memo=memo)
+                    else:
+                        np_ref_values = ref.evaluate(np_samples, f.numpy_dtype, memo=memo)
+                with profiling.phase('target evaluate'):
+                    np_values = f.evaluate(np_samples, f.numpy_dtype, memo=memo)
+                self.insert_comparison(voffset, hoffset + imag_axis_width, np_ref_values[::-1].copy(), np_values[::-1], np_samples[::-1], apply_ftz=apply_ftz)
+                axis_samples = np_samples[::-1]
+            else:
+                axis_samples = self.insert_tiled_comparison(voffset, hoffset + imag_axis_width, ref, f, sampler, size_re, size_im,
+                                                            tile_size, map_size, apply_daz=apply_daz, apply_ftz=apply_ftz)[::-1]
+                # the real line is subsampled at map axis points
+                np_samples_real = axis_samples.real[:1].copy()
 
-            np_values = f.evaluate(np_samples, f.numpy_dtype)
-            np_values_real = f.evaluate(np_samples_real, f.numpy_real_dtype)
+            with profiling.phase('reference evaluate'):
+                if apply_daz:
+                    np_ref_values_real = ref.evaluate(ftz_array(np_samples_real.copy()), f.numpy_real_dtype, memo=memo)
+                else:
+                    np_ref_values_real = ref.evaluate(np_samples_real, f.numpy_real_dtype, memo=memo)
+            with profiling.phase('target evaluate'):
+                np_values_real = f.evaluate(np_samples_real, f.numpy_real_dtype, memo=memo)
 
-            hoffset = index * (imag_axis_width + map_width + 2)
-            self.insert_comparison(voffset, hoffset + imag_axis_width, np_ref_values[::-1].copy(), np_values[::-1], np_samples[::-1], apply_ftz=apply_ftz)
-            self.insert_imag_axis(voffset, hoffset + -2 + imag_axis_width, np_samples[::-1])
+            self.insert_imag_axis(voffset, hoffset + -2 + imag_axis_width, axis_samples)
 
             self.insert_text(voffset + map_height + 1, hoffset + 10, "real line:", align='right')
             self.insert_comparison(voffset + map_height + 1, hoffset + imag_axis_width, np_ref_values_real.copy(), np_values_real, np_samples_real, save=False, apply_ftz=apply_ftz)
 
-            self.insert_real_axis(voffset + map_height + 2, hoffset + imag_axis_width, np_samples[::-1])
+            self.insert_real_axis(voffset + map_height + 2, hoffset + imag_axis_width, axis_samples)
 
             self.insert_text(voffset + map_height + 3 + 2, hoffset + imag_axis_width - 8, f'{f.title}\nvs\n{ref.title}')
             self.insert_text(voffset + map_height + 8 + 2, hoffset, '\nStatistics:')
@@ -364,13 +822,10 @@ class ReportImage:
                 (slice(c_re, c_re+1), slice(0, image.shape[1])),
                 (slice(0, image.shape[0]), slice(c_im, c_im+1))
         ]:
-            region = image[region_slice]
-            clusters = Clusters()
-            for point in zip(*numpy.where(region == code.encode())):
-                clusters.add(point)
-
-            for cluster in clusters.clusters:
-                x, y = cluster.center_point()
+            with profiling.phase('clustering'):
+                labels = connected_components(image[region_slice] == code.encode())
+                points = component_center_points(labels)
+            for x, y in points:
                 samples.append((region_slice[0].start + x, region_slice[1].start + y))
 
         return samples
@@ -405,66 +860,65 @@ class ReportImage:
         if i > 0:
             self.insert_text(row + i, col, f"Legend:\n    <input> -> <value> <reference value>")
 
-class Cluster:
-
-    def __init__(self):
-        self.points = set()
-
-    def contains(self, point):
-        for x, y in self.points:
-            for dx in {-1, 0, 1}:
-                for dy in {-1, 0, 1}:
-                    if point == (x + dx, y + dy):
-                        return True
-        return False
+def connected_components(mask):
+    """Return an array of labels of 8-connected components of the
+    points in 2-D boolean mask.
 
-    def add(self, point):
-        self.points.add(point)
-
-    def merge_from(self, other):
-        self.points.update(other.points)
-
-    def __repr__(self):
-        return f'{type(self).__name__}({self.points})'
-
-    def center(self):
-        sx, sy = 0, 0
-        for x, y in self.points:
-            sx += x
-            sy += y
-        return (sx / len(self.points), sy / len(self.points))
+    Points are labeled in row-major order using union-find. A point
+    gets the label of its already labeled neighbors. When these
+    belong to different components, the components are merged and
+    the point itself is left unlabeled. Labels of points outside of
+    components are zero, and components are ordered by their first
+    points.
+    """
+    # labels of mask points are stored at index (row + 1, col + 1)
+    labels = numpy.zeros((mask.shape[0] + 1, mask.shape[1] + 2), dtype=numpy.intp)
+    parent = [0]
+
+    def find(label):
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    for row, col in zip(*numpy.nonzero(mask)):
+        neighbors = [labels[row, col], labels[row, col + 1], labels[row, col + 2], labels[row + 1, col]]
+        roots = {find(label) for label in neighbors if label}
+        if not roots:
+            parent.append(len(parent))
+            labels[row + 1, col + 1] = parent[-1]
+        elif len(roots) == 1:
+            labels[row + 1, col + 1] = roots.pop()
+        else:
+            root = min(roots)
+            for label in roots:
+                parent[label] = root
 
-    def center_point(self):
-        cx, cy = self.center()
-        lst = []
-        for x, y in self.points:
-            lst.append((abs(x - cx) + abs(y - cy), (x, y)))
-        return sorted(lst)[0][1]
+    parent = numpy.array(parent)
+    while True:
+        grandparent = parent[parent]
+        if numpy.array_equal(grandparent, parent):
+            break
+        parent = grandparent
+    return parent[labels[1:, 1:-1]]
 
-class Clusters:
 
-    def __init__(self):
-        self.clusters = []
+def component_center_points(labels):
+    """Return a list of component points (row, col) that are closest to
+    component centers in 1-norm, see `connected_components`.
 
-    def __repr__(self):
-        return f'{type(self).__name__}({self.clusters})'
-
-    def add(self, point):
-        matching_clusters = []
-        for index, cluster in enumerate(self.clusters):
-            if cluster.contains(point):
-                matching_clusters.append(index)
-
-        if len(matching_clusters) == 0:
-            self.clusters.append(Cluster())
-            self.clusters[-1].add(point)
-        elif len(matching_clusters) == 1:
-            self.clusters[matching_clusters[0]].add(point)
-        else:
-            cluster = self.clusters[matching_clusters[0]]
-            for index in reversed(matching_clusters[1:]):
-                cluster.merge_from(self.clusters[index])
-                del self.clusters[index]
+    Ties are resolved by the smallest point.
+    """
+    rows, cols = numpy.nonzero(labels)
+    point_labels = labels[rows, cols]
+    counts = numpy.bincount(point_labels)
+    with numpy.errstate(invalid='ignore'):
+        center_rows = numpy.bincount(point_labels, weights=rows) / counts
+        center_cols = numpy.bincount(point_labels, weights=cols) / counts
+    distances = abs(rows - center_rows[point_labels]) + abs(cols - center_cols[point_labels])
+    order = numpy.lexsort((cols, rows, distances, point_labels))
+    first = order[numpy.flatnonzero(numpy.diff(point_labels[order], prepend=-1))]
+    return list(zip(rows[first].tolist(), cols[first].tolist()))
 
 
 class Function:
@@ -474,12 +928,21 @@ class Function:
     library_name = NotImplemented
     namespace = NotImplemented
     array_namespace = NotImplemented
+    # the name of the distribution package that provides namespace
+    distribution = None
 
-    def __init__(self, name, dtype, device=''):
+    def __init__(self, name, dtype, device='', daz=False):
+        """
+        Parameters
+        ----------
+        daz: when True, model the DAZ (denormals-are-zero) behavior of
+          the device, see `apply_daz`
+        """
         self._name = name
         self._dtype = dtype
         self._real_dtype = dict(complex64='float32', complex128='float64', complex256='float64')[dtype]
         self._device = device or 'cpu'
+        self.daz = daz
         self._module = None
         self._array_module = None
 
@@ -489,6 +952,21 @@ class Function:
         if module is not None:
             version = getattr(module, '__version__')
             return f'{cls.namespace} {version}'
+
+    @classmethod
+    def get_version(cls):
+        """Return the same as get_module_version but without importing
+        the module when the version is available from the metadata of
+        the distribution package.
+        """
+        if cls.distribution is None:
+            return cls.get_module_version()
+        import importlib.metadata
+        try:
+            version = importlib.metadata.version(cls.distribution)
+        except importlib.metadata.PackageNotFoundError:
+            return None
+        return f'{cls.distribution} {version}'
         
     @classmethod
     def get_module(cls):
@@ -504,6 +982,11 @@ class Function:
         except ImportError:
             pass
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_module=None, _array_module=None)
+        return state
+
     @property
     def is_valid(self):
         return True
@@ -541,14 +1024,22 @@ class Function:
         return getattr(numpy, self._real_dtype)
 
     def from_numpy(self, data, dtype=None):
+        """Return numpy array data as an array of the array module.
+
+        The data is copied only when dtype or device require it.
+        """
         if dtype is None:
             dtype = self.dtype
-        return self.array_module.array(data, dtype=dtype)
+        return self.array_module.asarray(data, dtype=dtype)
 
     def to_numpy(self, data, dtype=None):
+        """Return array data as a numpy array with given dtype.
+
+        The data is copied only when dtype or device require it.
+        """
         if dtype is None:
             dtype = self.numpy_dtype
-        return numpy.array(data, dtype=dtype)
+        return numpy.asarray(data, dtype=dtype)
     
     def __call__(self, *args):
         return getattr(self.module, self._name)(*args)
@@ -557,6 +1048,11 @@ class Function:
     def context(self):
         return contextlib.nullcontext()
 
+    def synchronize(self):
+        """Wait for the completion of function evaluations on device.
+        """
+        pass
+
     @classmethod
     def get_valid_functions(cls, fname, dtype):
         result = []
@@ -571,10 +1067,25 @@ class Function:
     def apply_ftz(cls, *args, **kwargs):
         raise NotImplementedError(cls.__name__)
 
-    def evaluate(self, np_samples, numpy_dtype):
+    def apply_daz(self, device):
+        """Return True when reference functions are evaluated on flushed
+        inputs to model a device that treats subnormal inputs as zeros.
+        Requires daz to be True.
+        """
+        return False
+
+    def evaluate(self, np_samples, numpy_dtype, memo=None):
+        """Return function values on samples as numpy array with given dtype.
+
+        When memo (an EvaluationMemo instance) is specified, the values
+        are looked up from memo before evaluating the function.
+        """
+        if memo is not None:
+            return memo.evaluate(self, np_samples, numpy_dtype)
         if np_samples.dtype.kind == 'c':
             dtype = self.dtype
         dtype = {'c': self.dtype, 'f': self.real_dtype}[np_samples.dtype.kind]
+        profiling.count(f'{self.library_name} samples', np_samples.size)
 
         with self.context:
             samples = self.from_numpy(np_samples, dtype=dtype)
@@ -588,6 +1099,7 @@ class NumpyFunction(Function):
     library_name = 'NumPy'
     namespace = 'numpy'
     array_namespace = 'numpy'
+    distribution = 'numpy'
 
     @property
     def is_valid(self):
@@ -602,6 +1114,7 @@ class ComplexMathFunction(NumpyFunction):
     library_name = 'ComplexMath'
     namespace = 'complex_function_validation.complex_math'
     array_namespace = 'numpy'
+    distribution = None
 
     @property
     def is_valid(self):
@@ -613,9 +1126,33 @@ class JaxNumpyFunction(Function):
     library_name = 'JAX'
     namespace = 'jax.numpy'
     array_namespace = 'jax.numpy'
+    distribution = 'jax'
 
     _jax_module = None
-    
+    # process-wide state: x64 flag, devices, device probes, and jit
+    # compiled functions
+    _x64_enabled = False
+    _devices = {}
+    _valid_devices = {}
+    _jit_cache = {}
+
+    def __init__(self, name, dtype, device='', jit=True, daz=False):
+        """
+        Parameters
+        ----------
+        jit: when True, evaluate the function with jax.jit compiled
+          callables that are cached per function, dtype, device, and
+          samples shape
+        daz: when True, model the DAZ (denormals-are-zero) behavior of
+          CPU devices by evaluating reference functions on flushed
+          inputs, see `apply_daz`
+        """
+        super().__init__(name, dtype, device=device, daz=daz)
+        self.jit = jit
+        self.jit_hits = 0
+        self.jit_misses = 0
+        self.elapsed = 0.0
+
     @classmethod
     def get_module_version(cls):
         module = cls.get_module()
@@ -651,32 +1188,84 @@ class JaxNumpyFunction(Function):
         cls._jax_module = module
         return module
 
+    @property
+    def jax_device(self):
+        device = JaxNumpyFunction._devices.get(self._device)
+        if device is None:
+            import jax
+            device = JaxNumpyFunction._devices[self._device] = jax.devices(self._device)[0]
+        return device
+
     @property
     def context(self):
         import jax
-        jax.config.update("jax_enable_x64", True)
-        return jax.default_device(jax.devices(self._device)[0])
+        if not JaxNumpyFunction._x64_enabled:
+            jax.config.update("jax_enable_x64", True)
+            JaxNumpyFunction._x64_enabled = True
+        return jax.default_device(self.jax_device)
 
     @property
     def is_valid(self):
         if self._device == 'cuda':
+            valid = JaxNumpyFunction._valid_devices.get(self._device)
+            if valid is None:
+                import jax
+                try:
+                    _ = jax.device_put(jax.numpy.ones(1), device=jax.devices('gpu')[0])
+                    valid = True
+                except Exception as msg:
+                    valid = False
+                JaxNumpyFunction._valid_devices[self._device] = valid
+            return valid
+        return True
+
+    def __call__(self, *args):
+        import time
+        start = time.time()
+        func = getattr(self.module, self._name)
+        if self.jit:
+            key = (self._name, self._dtype, self._device) + tuple((arg.shape, str(arg.dtype)) for arg in args)
+            jitted = JaxNumpyFunction._jit_cache.get(key)
+            if jitted is None:
+                import jax
+                jitted = JaxNumpyFunction._jit_cache[key] = jax.jit(func)
+                self.jit_misses += 1
+            else:
+                self.jit_hits += 1
+            func = jitted
+        result = func(*args).block_until_ready()
+        self.elapsed += time.time() - start
+        return result
+
+    def from_numpy(self, data, dtype=None):
+        if dtype is None:
+            dtype = self.dtype
+        if self._device == 'cpu' and data.dtype == numpy.dtype(dtype):
             import jax
             try:
-                _ = jax.device_put(jax.numpy.ones(1), device=jax.devices('gpu')[0])
-                return True
+                return jax.dlpack.from_dlpack(data)
             except Exception as msg:
-                return False
-        return True
+                # e.g. read-only or unaligned arrays
+                pass
+        return self.array_module.asarray(data, dtype=dtype)
+
+    def stats_summary(self):
+        return (f'jax jit cache: {self.jit_hits} hits, {self.jit_misses} compilations,'
+                f' {self.elapsed:.3f} seconds in evaluations')
 
     @classmethod
     def apply_ftz(cls, device):
         return device in {'cpu', ''}
 
+    def apply_daz(self, device):
+        return self.daz and device in {'cpu', ''}
+
 class TorchFunction(Function):
 
     library_name = 'PyTorch'
     namespace = 'torch'
     array_namespace = 'torch'
+    distribution = 'torch'
 
     @property
     def is_valid(self):
@@ -685,15 +1274,28 @@ class TorchFunction(Function):
             return torch.cuda.is_available()
         return True
 
+    def synchronize(self):
+        if self._device == 'cuda':
+            self.module.cuda.synchronize()
+
     def from_numpy(self, data, dtype=None):
         if dtype is None:
             dtype = self.dtype
-        return self.module.tensor(data, dtype=dtype, device=self._device)
+        torch = self.module
+        if data.flags.writeable and data.dtype.isnative:
+            try:
+                tensor = torch.from_numpy(data)
+            except (TypeError, ValueError):
+                # numpy dtype not supported by torch or negative strides
+                pass
+            else:
+                return tensor.to(device=self._device, dtype=dtype)
+        return torch.tensor(data, dtype=dtype, device=self._device)
 
     def to_numpy(self, data, dtype=None):
         if dtype is None:
             dtype = self.numpy_dtype
-        return numpy.array(data.cpu(), dtype=dtype)
+        return numpy.asarray(data.detach().cpu().resolve_conj().numpy(), dtype=dtype)
 
     @classmethod
     def apply_ftz(cls, *args, **kwargs):
@@ -704,6 +1306,47 @@ class MPMathFunction(Function):
     library_name = 'MPMath'
     namespace = 'mpmath'
     array_namespace = 'numpy'
+    distribution = 'mpmath'
+
+    _executor = None
+
+    _digits = dict(float128=36, float64=18, float32=9)
+
+    def __init__(self, name, dtype, device='', cache=None, executor=None, chunks=None, max_precision=None):
+        """
+        Parameters
+        ----------
+        cache: ReferenceCache instance for persistent function values
+        executor: concurrent.futures executor used for evaluating
+          chunks of samples in parallel, see `shared_executor`
+        chunks: the number of chunks, defaults to 4 times the number
+          of CPUs
+        max_precision: when specified, the precision is escalated
+          adaptively up to max_precision decimal digits, see
+          `evaluate_adaptive`
+        """
+        super().__init__(name, dtype, device=device)
+        self.cache = cache
+        self.executor = executor
+        self.chunks = chunks
+        self.max_precision = max_precision
+        self.escalations = {}
+        self._precision = None
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.update(cache=None, executor=None)
+        return state
+
+    @classmethod
+    def shared_executor(cls, max_workers=None):
+        """Return a process pool executor that is shared between
+        MPMathFunction instances.
+        """
+        if cls._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            MPMathFunction._executor = ProcessPoolExecutor(max_workers=max_workers)
+        return cls._executor
 
     @property
     def is_valid(self):
@@ -713,107 +1356,108 @@ class MPMathFunction(Function):
     def apply_ftz(cls, *args, **kwargs):
         return False
 
+    @property
+    def precision(self):
+        if self._precision is not None:
+            return self._precision
+        return self._digits[self._real_dtype] + 2
+
     @property
     def context(self):
         import mpmath
-        precision = dict(float128=36, float64=18, float32=9)[self._real_dtype] + 2
-        return mpmath.workdps(precision)
-
-    def __call__(self, *args):
-        mpmath = self.module
-        assert len(args) == 1
-
-        def tosymbolpair(x):
-            if x.real == 0:
-                re = '0'
-            elif mpmath.isfinite(x.real):
-                re = '+x' if x.real > 0 else '-x'
-            else:
-                re = str(x.real)
-            if x.imag == 0:
-                im = '0'
-            elif mpmath.isfinite(x.imag):
-                im = '+x' if x.imag > 0 else '-x'
-            else:
-                im = str(x.imag)
-            return re, im
-
-        def special_cases_func(name, x):
-            is_real = False
-            if isinstance(x, float):
-                if (
-                        (name in {'sqrt', 'log', 'log10', 'log2'} and x < 0)
-                        or (name=='log1p' and x < -1)
-                        or (name in {'asin', 'acos', 'atanh'} and abs(x) > 1)
-                        or (name == 'acosh' and x < 1)
-                ):
-                    return float('nan')
-                is_real = True
-                x = mpmath.mpc(x, 0)
-            elif isinstance(x, complex):
-                x = mpmath.mpc(x.real, x.imag)
-            else:
-                assert 0, x
-
-            if mpmath.isfinite(x.real) and mpmath.isfinite(x.imag):
-                return
-
-            re, im = tosymbolpair(x)
-            if is_real and name in {'square'} and im == '0':
-                # reset im when f(re+0j) is different from f(re)
-                im = ''
-            result = None
-            if name in {'asin', 'atan', 'sin', 'tan'}:
-                # TODO: implement the following transformations in special_cases.py
-                # asin(z) = -j * asinh(j * z)
-                # atan(z) = -j * atanh(j * z)
-                # sin(z) = -j * sinh(j * z)
-                # tan(z) = -j * tanh(j * z)
-                name2 = dict(asin='asinh', atan='atanh', sin='sinh', tan='tanh')[name]
-                # j * (re, im) = (-im, re)
-                nim = {'+x': '-x', '-x': '+x', '+inf': '-inf', '-inf': '+inf'}.get(im)
-                if nim is None:
-                    assert im in {'nan', '0'}, im
-                    nim = im
-                re, im = nim, re
-                re, im = getattr(special_cases, name2)[re, im]
-                # -j * (re, im) = (im, -re)
-                nre = {'+x': '-x', '-x': '+x', '+inf': '-inf', '-inf': '+inf'}.get(re)
-                if nre is None:
-                    if re in {'nan', '0', '+-inf'}:
-                        nre = re
-                    else:
-                        nre = f'-({re})'
-                re, im = im, nre
-                r = [eval({'+-inf': 'nan'}.get(r_, r_),
-                          dict(inf=mpmath.inf, nan=mpmath.nan, pi=mpmath.pi,
-                               sin=mpmath.sin, cos=mpmath.cos, im=x.real,
-                            log=mpmath.log)) for r_ in [re, im]]
-                result = mpmath.mpc(*r)
-            elif name == 'cos':
-                #  cos(z) = cosh(j * z)
-                # j * (re, im) = (-im, re)
-                nim = {'+x': '-x', '-x': '+x', '+inf': '-inf', '-inf': '+inf'}.get(im)
-                if nim is None:
-                    assert im in {'nan', '0'}, im
-                    nim = im
-                re, im = nim, re
-                r = special_cases.cosh[re, im]
-                r = [eval({'+-inf': 'nan'}.get(r_, r_), dict(pi=mpmath.pi, inf=mpmath.inf, nan=mpmath.nan,
-                                                             sin=mpmath.sin, cos=mpmath.cos, im=x.real)) for r_ in r]
-                return mpmath.mpc(*r)
-            elif hasattr(special_cases, name):
-                r = getattr(special_cases, name)[re, im]
-                r = [eval({'+-inf': 'nan'}.get(r_, r_), dict(inf=mpmath.inf, nan=mpmath.nan, pi=mpmath.pi,
-                                                             sin=mpmath.sin, cos=mpmath.cos, im=x.imag,
-                                                             log=mpmath.log)) for r_ in r]
-                result = mpmath.mpc(*r)
-
-            if is_real and result is not None:
-                result = result.real
-
-            return result
+        return mpmath.workdps(self.precision)
+
+    def evaluate(self, np_samples, numpy_dtype, memo=None):
+        if memo is not None:
+            return memo.evaluate(self, np_samples, numpy_dtype)
+        if self.max_precision is None:
+            evaluate = self._evaluate_chunks
+            params = dict(dps=self.precision)
+        else:
+            evaluate = self.evaluate_adaptive
+            params = dict(max_dps=self.max_precision)
+        if self.cache is None:
+            return evaluate(np_samples, numpy_dtype)
+        key = self.cache.key(np_samples, name=self._name, dtype=self._dtype,
+                             numpy_dtype=numpy.dtype(numpy_dtype).name,
+                             version=self.get_module_version(), **params)
+        np_values = self.cache.get(key)
+        if np_values is None:
+            np_values = evaluate(np_samples, numpy_dtype)
+            self.cache.put(key, np_values)
+        return np_values
 
+    def evaluate_adaptive(self, np_samples, numpy_dtype):
+        """Return function values on samples with adaptive precision.
+
+        The function is evaluated with the precision of numpy_dtype.
+        The values that differ from the values of the corresponding
+        numpy function or have exact zero components are re-evaluated
+        with doubled precision, and so on, only on the samples for
+        which the values rounded to numpy_dtype changed, until the
+        values do not change or max_precision is reached. The numpy
+        and mpmath implementations are independent, so that values
+        that match are unlikely to be both wrong.
+        The number of samples evaluated with a given precision is
+        accumulated in the escalations dictionary.
+        """
+        import copy
+        f = copy.copy(self)
+        f.cache = f.max_precision = None
+        f._precision = min(self._digits[numpy.finfo(numpy_dtype).dtype.name] + 2, self.max_precision)
+        samples = np_samples.ravel()
+        np_values = f._evaluate_chunks(samples, numpy_dtype)
+        self.escalations[f._precision] = self.escalations.get(f._precision, 0) + samples.size
+        unstable = numpy.ones(samples.size, dtype=bool)
+        if hasattr(numpy, self._name):
+            with numpy.errstate(all='ignore'):
+                unstable = ~_same_values(np_values, NumpyFunction(self._name, 'complex128').evaluate(samples, numpy_dtype))
+                if samples.dtype.kind == 'c' and self._name != 'abs':
+                    unstable |= numpy.isfinite(samples) & (((np_values.real == 0) & (samples.real != 0))
+                                                           | ((np_values.imag == 0) & (samples.imag != 0)))
+        pending = numpy.flatnonzero(unstable)
+        while pending.size and f._precision < self.max_precision:
+            f._precision = min(2 * f._precision, self.max_precision)
+            values = f._evaluate_chunks(samples[pending], numpy_dtype)
+            self.escalations[f._precision] = self.escalations.get(f._precision, 0) + pending.size
+            changed = ~_same_values(np_values[pending], values)
+            if samples.dtype.kind == 'c' and self._name != 'abs':
+                # mpmath returns exact zero when all digits of a value
+                # component cancel out, such zeros are not trusted
+                # unless the corresponding sample component is zero
+                x = samples[pending]
+                with numpy.errstate(invalid='ignore'):
+                    zeros = ~changed & numpy.isfinite(x) & (((values.real == 0) & (x.real != 0))
+                                                            | ((values.imag == 0) & (x.imag != 0)))
+                if zeros.any():
+                    changed[zeros] = f._exact_zeros(x[zeros])
+            np_values[pending] = values
+            pending = pending[changed]
+        return np_values.reshape(np_samples.shape)
+
+    def stats_summary(self):
+        levels = ', '.join(f'{dps} dps: {count}' for dps, count in sorted(self.escalations.items()))
+        return f'mpmath precision escalations: {levels}'
+
+    def _evaluate_chunks(self, np_samples, numpy_dtype):
+        if self.executor is None:
+            return super().evaluate(np_samples, numpy_dtype)
+        import os
+        chunks = min(self.chunks or 4 * (os.cpu_count() or 1), np_samples.size)
+        if chunks <= 1:
+            return super().evaluate(np_samples, numpy_dtype)
+        # interleaved chunks balance the load when expensive samples
+        # are clustered
+        samples = np_samples.ravel()
+        parts = [samples[i::chunks] for i in range(chunks)]
+        np_values = numpy.empty(samples.shape, dtype=numpy_dtype)
+        for i, values in enumerate(self.executor.map(_evaluate_chunk, [self] * chunks, parts, [numpy_dtype] * chunks)):
+            np_values[i::chunks] = values
+        return np_values.reshape(np_samples.shape)
+
+    def _mpmath_function(self):
+        """Return mpmath function name and the corresponding mpmath function.
+        """
         name = dict(arcsin='asin',
                     arccos='acos',
                     arctan='atan',
@@ -843,26 +1487,238 @@ class MPMathFunction(Function):
         else:
             ext_func = getattr(self.module, name)
 
-        def ext_func_with_special_cases(x):
+        return name, ext_func
 
-            r = special_cases_func(name, x)
-            if r is None:
-                r = ext_func(x)
+    def _exact_zeros(self, samples):
+        """Return a mask of complex samples at which mpmath function
+        value has an exact zero component while the corresponding
+        sample component is non-zero.
+        """
+        mpmath = self.module
+        _, ext_func = self._mpmath_function()
 
-            if isinstance(r, (float, complex)):
-                pass
-            elif isinstance(x, complex):
-                r = complex(r)
-            elif isinstance(x, float):
-                if isinstance(r, mpmath.mpc):
-                    assert r.imag==0 or mpmath.isnan(r.imag), (name, x, r)
-                    r = r.real
-                assert isinstance(r, mpmath.mpf), (name, x, r)
-                r = float(r)
+        def check(x):
+            r = mpmath.mpc(ext_func(x))
+            return (r.real == 0 and x.real != 0) or (r.imag == 0 and x.imag != 0)
+
+        with self.context:
+            return numpy.vectorize(check, otypes=[bool])(samples.astype(numpy.complex128))
+
+    def __call__(self, *args):
+        mpmath = self.module
+        assert len(args) == 1
+        samples = numpy.asarray(args[0])
+        is_real = samples.dtype.kind == 'f'
+        name, ext_func = self._mpmath_function()
+
+        def ext_func_with_conversion(x):
+            r = ext_func(x)
+            if isinstance(x, complex):
+                return complex(r)
+            if isinstance(r, mpmath.mpc):
+                assert r.imag==0 or mpmath.isnan(r.imag), (name, x, r)
+                r = r.real
+            assert isinstance(r, mpmath.mpf), (name, x, r)
+            return float(r)
+
+        values = numpy.empty(samples.shape, dtype=numpy.float64 if is_real else numpy.complex128)
+        pending = numpy.ones(samples.shape, dtype=bool)
+
+        if is_real:
+            with numpy.errstate(invalid='ignore'):
+                if name in {'sqrt', 'log', 'log10', 'log2'}:
+                    domain_error = samples < 0
+                elif name == 'log1p':
+                    domain_error = samples < -1
+                elif name in {'asin', 'acos', 'atanh'}:
+                    domain_error = abs(samples) > 1
+                elif name == 'acosh':
+                    domain_error = samples < 1
+                else:
+                    domain_error = numpy.zeros(samples.shape, dtype=bool)
+            values[domain_error] = numpy.nan
+            pending &= ~domain_error
+
+        re_symbols = _symbol_classes(samples.real)
+        im_symbols = numpy.full(samples.shape, _symbols.index('0')) if is_real else _symbol_classes(samples.imag)
+        for (re, im), (re_value, im_value, im_from_real) in _special_cases_plan(name, is_real, mpmath.mp.dps).items():
+            mask = pending & (re_symbols == _symbols.index(re)) & (im_symbols == _symbols.index(im))
+            if not mask.any():
+                continue
+            x = (samples.real if im_from_real else samples.imag)[mask]
+            if is_real:
+                values[mask] = re_value(x)
             else:
-                assert 0, (name, x, r)
-            return r
+                values.real[mask] = re_value(x)
+                values.imag[mask] = im_value(x)
+            pending &= ~mask
+
+        if pending.any():
+            f = numpy.vectorize(ext_func_with_conversion, otypes=[values.dtype])
+            values[pending] = f(samples[pending])
+
+        return values
+
+
+# Symbols classifying the real and imaginary parts of inputs to
+# special_cases tables:
+_symbols = ['nan', '+inf', '-inf', '0', '+x', '-x']
+_negated_symbols = {'+x': '-x', '-x': '+x', '+inf': '-inf', '-inf': '+inf'}
+
+
+def _symbol_classes(x):
+    """Return an array of indices to _symbols that classify the values of x.
+    """
+    classes = numpy.zeros(x.shape, dtype=numpy.int8)
+    with numpy.errstate(invalid='ignore'):
+        classes[x == numpy.inf] = _symbols.index('+inf')
+        classes[x == -numpy.inf] = _symbols.index('-inf')
+        classes[x == 0] = _symbols.index('0')
+        finite = numpy.isfinite(x) & (x != 0)
+        classes[finite & (x > 0)] = _symbols.index('+x')
+        classes[finite & (x < 0)] = _symbols.index('-x')
+    return classes
+
+
+def _special_cases_table(name, is_real):
+    """Return a dictionary of special_cases expressions
+
+      {(re, im): (re_expr, im_expr, im_from_real)}
+
+    for the given mpmath function name and non-finite inputs. Here
+    im_from_real is True when `im` in expressions refers to the real
+    part of input.
+    """
+    finite_symbols = {'0', '+x', '-x'}
+    table = {}
+    for re in _symbols:
+        for im in (['0'] if is_real else _symbols):
+            if re in finite_symbols and im in finite_symbols:
+                continue
+            # f(re+0j) is different from f(re) for square
+            im_ = '' if is_real and name == 'square' else im
+            if name in {'asin', 'atan', 'sin', 'tan'}:
+                # asin(z) = -j * asinh(j * z)
+                # atan(z) = -j * atanh(j * z)
+                # sin(z) = -j * sinh(j * z)
+                # tan(z) = -j * tanh(j * z)
+                name2 = dict(asin='asinh', atan='atanh', sin='sinh', tan='tanh')[name]
+                # j * (re, im) = (-im, re)
+                r = getattr(special_cases, name2).get((_negated_symbols.get(im, im), re))
+                if r is None:
+                    continue
+                # -j * (re, im) = (im, -re)
+                nre = _negated_symbols.get(r[0])
+                if nre is None:
+                    nre = r[0] if r[0] in {'nan', '0', '+-inf'} else f'-({r[0]})'
+                table[re, im] = (r[1], nre, True)
+            elif name == 'cos':
+                #  cos(z) = cosh(j * z)
+                r = special_cases.cosh.get((_negated_symbols.get(im, im), re))
+                if r is not None:
+                    table[re, im] = (*r, True)
+            elif hasattr(special_cases, name):
+                r = getattr(special_cases, name).get((re, im_))
+                if r is not None:
+                    table[re, im] = (*r, False)
+    return table
+
+
+@functools.lru_cache
+def _special_cases_plan(name, is_real, dps):
+    """Return a dictionary of vectorized special_cases functions
+
+      {(re, im): (re_func, im_func, im_from_real)}
+
+    for the given mpmath function name and non-finite inputs. The
+    functions take an array of `im` values and return an array or a
+    scalar. Constant expressions are evaluated by mpmath using the
+    given precision.
+    """
+    import mpmath
+
+    def compile_expr(expr):
+        expr = {'+-inf': 'nan'}.get(expr, expr)
+        if re_module.search(r'\bim\b', expr) is None:
+            with mpmath.workdps(dps):
+                value = float(mpmath.mpf(eval(expr, dict(inf=mpmath.inf, nan=mpmath.nan, pi=mpmath.pi,
+                                                          sin=mpmath.sin, cos=mpmath.cos, log=mpmath.log))))
+            return lambda im: value
+        code = compile(expr, expr, 'eval')
+
+        def func(im):
+            with numpy.errstate(all='ignore'):
+                # mpmath zeros are unsigned, + 0.0 turns -0.0 to 0.0
+                return eval(code, dict(inf=numpy.inf, nan=numpy.nan, pi=numpy.pi,
+                                       sin=numpy.sin, cos=numpy.cos, log=numpy.log, im=im)) + 0.0
+
+        return func
+
+    return {key: (compile_expr(re), compile_expr(im), im_from_real)
+            for key, (re, im, im_from_real) in _special_cases_table(name, is_real).items()}
+
+
+class DoubleDoubleFunction(Function):
+    """Fast reference functions for float32 and complex64 samples.
+
+    Functions are evaluated in float64 and double-double arithmetic
+    and the values are correctly rounded to float32. Samples for which
+    the rounding is ambiguous, as well as samples with special values
+    or zero components, are evaluated with the fallback function.
+    """
+    library_name = 'DoubleDouble'
+    namespace = 'complex_function_validation.double_double'
+    array_namespace = 'numpy'
+
+    def __init__(self, name, dtype, device='', fallback=None):
+        """
+        Parameters
+        ----------
+        fallback: Function instance used for the samples that are not
+          supported, defaults to MPMathFunction
+        """
+        super().__init__(name, dtype, device=device)
+        if fallback is None:
+            fallback = MPMathFunction(name, dtype, device=device)
+        self.fallback = fallback
+
+    @classmethod
+    def get_module_version(cls):
+        return f'{cls.namespace} {cls.get_module().__version__}'
+
+    @property
+    def is_valid(self):
+        return self._device.lower() in {'cpu', ''} and hasattr(self.get_module(), self._name)
+
+    @classmethod
+    def apply_ftz(cls, *args, **kwargs):
+        return False
+
+    def evaluate(self, np_samples, numpy_dtype, memo=None):
+        if memo is not None:
+            return memo.evaluate(self, np_samples, numpy_dtype)
+        if numpy.dtype(numpy_dtype) not in {numpy.dtype(numpy.complex64), numpy.dtype(numpy.float32)}:
+            return self.fallback.evaluate(np_samples, numpy_dtype)
+        samples = numpy.asarray(np_samples, dtype={'c': numpy.complex128, 'f': numpy.float64}[np_samples.dtype.kind])
+        with numpy.errstate(all='ignore'):
+            np_values, certain = self.module.round_float32(*self(samples))
+        certain &= self.module.is_supported(samples)
+        np_values = np_values.astype(numpy_dtype)
+        if not certain.all():
+            uncertain = ~certain
+            np_values[uncertain] = self.fallback.evaluate(np_samples[uncertain], numpy_dtype)
+        return np_values
+
+
+def _same_values(a, b):
+    """Return a mask of equal values, nans are considered equal and
+    zeros with different signs are considered different.
+    """
+    mask = numpy.ones(a.shape, dtype=bool)
+    for a_, b_ in ([(a.real, b.real), (a.imag, b.imag)] if a.dtype.kind == 'c' else [(a, b)]):
+        mask &= ((a_ == b_) & (numpy.signbit(a_) == numpy.signbit(b_))) | (numpy.isnan(a_) & numpy.isnan(b_))
+    return mask
 
-        f = numpy.vectorize(ext_func_with_special_cases)
 
-        return f(*args)
+def _evaluate_chunk(function, np_samples, numpy_dtype):
+    return function.evaluate(np_samples, numpy_dtype)
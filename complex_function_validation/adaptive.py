@@ -0,0 +1,191 @@
+"""Adaptive refinement of comparison maps.
+
+The samples grid of `ComplexPlaneSampler` is first evaluated on a
+coarse subgrid. Grid cells whose corner codes disagree are then
+subdivided recursively (quadtree refinement) so that the boundaries
+between regions of different comparison codes are resolved at the
+full grid resolution while the interiors of the regions are not
+evaluated. For instance:
+
+  >>> import complex_function_validation as cfv
+  >>> from complex_function_validation.adaptive import refine_plane
+  >>> plane = refine_plane(cfv.MPMathFunction('log1p', 'complex128'),
+  ...                      cfv.NumpyFunction('log1p', 'complex64'), 500, depth=6)
+  >>> print(plane.summary())
+  >>> print(plane.report())
+
+Cells are refined when their corner codes belong to different classes
+of codes, by default, the classes of matches, inaccuracies, and
+mismatches. Features that fit inside a cell with corner codes of the
+same class, say, an isolated mismatch, are not detected: use a
+smaller depth for a finer initial grid.
+"""
+
+import numpy
+
+from .sweep import SweepStats, compare_samples
+
+
+class RefinedPlane:
+    """Comparison codes on the samples grid `ComplexPlaneSampler(dtype)(size_re, size_im)`.
+
+    Attributes
+    ----------
+    codes: 2-D uint8 array of comparison codes, the codes of the
+      samples that were not evaluated are inferred from the corners
+      of their grid cells
+    evaluated: 2-D boolean array, True for evaluated samples
+    stats: SweepStats of evaluated samples
+    """
+
+    def __init__(self, real_axis, imag_axis, worst=10):
+        self.real_axis = real_axis
+        self.imag_axis = imag_axis
+        shape = (imag_axis.size, real_axis.size)
+        self.codes = numpy.zeros(shape, dtype=numpy.uint8)
+        self.evaluated = numpy.zeros(shape, dtype=bool)
+        self.stats = SweepStats(worst=worst)
+        self.title = ''
+
+    def __repr__(self):
+        return f'{type(self).__name__}(size_re={(self.real_axis.size - 3) // 2}, size_im={(self.imag_axis.size - 3) // 2})'
+
+    @property
+    def evaluations(self):
+        return self.stats.counts.sum()
+
+    def evaluate(self, ref, function, rows, cols):
+        """Evaluate and compare reference and function values on
+        samples at given grid indices.
+        """
+        samples = numpy.empty(rows.shape, dtype=numpy.result_type(self.real_axis.dtype, numpy.complex64))
+        samples.real[:] = self.real_axis[cols]
+        samples.imag[:] = self.imag_axis[rows]
+        reference, values, codes = compare_samples(ref, function, samples)
+        self.codes[rows, cols] = codes
+        self.evaluated[rows, cols] = True
+        self.stats.update(samples, reference, values, codes)
+
+    def fill(self, r0, r1, c0, c1):
+        """Set the codes of not evaluated samples in cells to the most
+        severe code of cell corners.
+        """
+        from . import _code_ranks, _ranked_codes
+        corners = numpy.stack([self.codes[r0, c0], self.codes[r0, c1], self.codes[r1, c0], self.codes[r1, c1]])
+        fill_codes = _ranked_codes[_code_ranks[corners].max(axis=0)]
+        for i in numpy.flatnonzero((r1 - r0 > 1) | (c1 - c0 > 1)):
+            cell = slice(r0[i], r1[i] + 1), slice(c0[i], c1[i] + 1)
+            self.codes[cell][~self.evaluated[cell]] = fill_codes[i]
+
+    def map(self, map_size=50):
+        """Return 2-D array of the most severe codes in map cells, the
+        first row of the map corresponds to the largest imaginary part.
+        """
+        from . import downsample_indices, downsample_labels, _code_ranks, _ranked_codes
+        size_re, size_im = (self.real_axis.size - 3) // 2, (self.imag_axis.size - 3) // 2
+        map_re, map_im = min(size_re, map_size), min(size_im, map_size)
+        rows_map = downsample_indices(size_im, map_im)
+        cols_map = downsample_indices(size_re, map_re)
+        ranks = numpy.full((2 * map_im + 3, 2 * map_re + 3), -1, dtype=numpy.int8)
+        numpy.maximum.at(ranks, (rows_map[:, None], cols_map), _code_ranks[self.codes])
+        axis_samples = numpy.empty(ranks.shape, dtype=numpy.result_type(self.real_axis.dtype, numpy.complex64))
+        axis_samples.real[:] = self.real_axis[downsample_labels(cols_map)]
+        axis_samples.imag[:] = self.imag_axis[downsample_labels(rows_map)][:, None]
+        return _ranked_codes[ranks[::-1]].view('S1'), axis_samples[::-1]
+
+    def summary(self):
+        total = self.codes.size
+        return '\n'.join([f'evaluated {self.evaluations} of {total} samples ({100 * self.evaluations / total:.1f}%)',
+                          self.stats.summary()])
+
+    def report(self, map_size=50):
+        """Return ReportImage of the code map and statistics.
+        """
+        from . import ReportImage
+        image = ReportImage()
+        codes, axis_samples = self.map(map_size)
+        image.insert(1, 10, codes)
+        image.insert_imag_axis(1, 8, axis_samples)
+        image.insert_real_axis(codes.shape[0] + 1, 10, axis_samples)
+        image.insert_text(codes.shape[0] + 4, 2, self.title)
+        image.insert_text(-1, 0, '\nStatistics:')
+        image.insert_text(-1, 4, self.summary())
+        return image
+
+
+def code_classes(classes):
+    """Return a lookup table of code classes, codes that are not in
+    any class form a class of their own.
+    """
+    table = numpy.arange(256, dtype=numpy.int16) + len(classes)
+    for i, codes in enumerate(classes):
+        table[numpy.frombuffer(codes.encode(), dtype=numpy.uint8)] = i
+    return table
+
+
+def refine_plane(ref, function, size_re, size_im=None, depth=5, max_evaluations=None, worst=10,
+                 classes=('=c~', '123456789ABCDEF', 'xXINM')):
+    """Compare function against reference function on the samples
+    grid using quadtree refinement.
+
+    Parameters
+    ----------
+    ref, function: Function instances
+    size_re, size_im: the size of samples grid, see `ComplexPlaneSampler`
+    depth: the initial grid is the subgrid of every 2 ** depth sample
+    max_evaluations: when specified, refinement stops before the number
+      of evaluated samples exceeds max_evaluations, the codes of the
+      cells that are not refined are set to the most severe code of
+      cell corners
+    worst: the number of worst offenders to keep, see `SweepStats`
+    classes: a sequence of strings of codes, a cell is refined when
+      its corner codes belong to different classes, by default, the
+      classes of matches, inaccuracies, and mismatches. Use () to
+      refine all cells with different corner codes.
+
+    Returns
+    -------
+    plane: RefinedPlane instance
+    """
+    from . import ComplexPlaneSampler
+    table = code_classes(classes)
+    if size_im is None:
+        size_im = size_re
+    sampler = ComplexPlaneSampler(function.numpy_dtype)
+    plane = RefinedPlane(sampler.axis(size_re), sampler.axis(size_im), worst=worst)
+    plane.title = f'{function.title}\nvs\n{ref.title}'
+
+    step = 2 ** depth
+    grid_rows = numpy.unique(numpy.append(numpy.arange(0, plane.imag_axis.size, step), plane.imag_axis.size - 1))
+    grid_cols = numpy.unique(numpy.append(numpy.arange(0, plane.real_axis.size, step), plane.real_axis.size - 1))
+    rows, cols = numpy.meshgrid(grid_rows, grid_cols, indexing='ij')
+    plane.evaluate(ref, function, rows.ravel(), cols.ravel())
+
+    # cells are defined by the grid indices of their corners
+    r0, c0 = [a.ravel() for a in numpy.meshgrid(grid_rows[:-1], grid_cols[:-1], indexing='ij')]
+    r1, c1 = [a.ravel() for a in numpy.meshgrid(grid_rows[1:], grid_cols[1:], indexing='ij')]
+    while r0.size:
+        codes = table[plane.codes]
+        uniform = ((codes[r0, c0] == codes[r0, c1]) & (codes[r0, c0] == codes[r1, c0])
+                   & (codes[r0, c0] == codes[r1, c1]))
+        split = ~uniform & ((r1 - r0 > 1) | (c1 - c0 > 1))
+        plane.fill(r0[~split], r1[~split], c0[~split], c1[~split])
+        r0, r1, c0, c1 = r0[split], r1[split], c0[split], c1[split]
+        rm, cm = (r0 + r1) // 2, (c0 + c1) // 2
+
+        rows = numpy.concatenate((rm, rm, r0, r1, rm))
+        cols = numpy.concatenate((c0, c1, cm, cm, cm))
+        index = numpy.unique(rows * plane.real_axis.size + cols)
+        index = index[~plane.evaluated.flat[index]]
+        if max_evaluations is not None and plane.evaluations + index.size > max_evaluations:
+            plane.fill(r0, r1, c0, c1)
+            break
+        plane.evaluate(ref, function, *numpy.divmod(index, plane.real_axis.size))
+
+        # subdivide cells, cells with a single row or column are
+        # subdivided only along the other axis
+        children = [numpy.concatenate(a) for a in zip((r0, rm, c0, cm), (r0, rm, cm, c1),
+                                                      (rm, r1, c0, cm), (rm, r1, cm, c1))]
+        nonempty = (children[0] < children[1]) & (children[2] < children[3])
+        r0, r1, c0, c1 = [a[nonempty] for a in children]
+    return plane
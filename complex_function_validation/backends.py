@@ -0,0 +1,71 @@
+"""Registry of array library backends.
+
+A backend is a Function subclass that provides the functions of an
+array library. Besides the builtin backends, other packages can
+register backends with entry points in the
+`complex_function_validation.backends` group, for instance, in
+pyproject.toml:
+
+  [project.entry-points."complex_function_validation.backends"]
+  mylib = "mylib_cfv:MyLibFunction"
+
+Backends are discovered from package metadata and backend classes are
+loaded only on demand. Array libraries are not imported: library
+availability and versions are determined from package metadata, see
+`Function.get_version`, so that the libraries are imported only in the
+processes that evaluate their functions.
+"""
+
+import importlib
+import importlib.metadata
+
+entry_point_group = 'complex_function_validation.backends'
+
+builtin_backends = dict(
+    mpmath='complex_function_validation:MPMathFunction',
+    numpy='complex_function_validation:NumpyFunction',
+    jax='complex_function_validation:JaxNumpyFunction',
+    torch='complex_function_validation:TorchFunction',
+    complex_math='complex_function_validation:ComplexMathFunction',
+)
+
+_backends = None
+_classes = {}
+
+
+def _discover():
+    global _backends
+    if _backends is None:
+        _backends = dict(builtin_backends)
+        for entry_point in importlib.metadata.entry_points(group=entry_point_group):
+            _backends.setdefault(entry_point.name, entry_point.value)
+    return _backends
+
+
+def backend_names():
+    """Return the names of registered backends.
+    """
+    return list(_discover())
+
+
+def get_backend(name):
+    """Return the Function subclass of a backend.
+    """
+    cls = _classes.get(name)
+    if cls is None:
+        backends = _discover()
+        if name not in backends:
+            raise KeyError(f'unknown backend {name!r}, available backends: {", ".join(backends)}')
+        module_name, _, attr = backends[name].partition(':')
+        cls = getattr(importlib.import_module(module_name), attr)
+        _classes[name] = cls
+    return cls
+
+
+def library(name):
+    """Return (library name, Function subclass, version) of a backend
+    as used by `run.main_results`. The version is None when the array
+    library is not installed.
+    """
+    cls = get_backend(name)
+    return cls.library_name, cls, cls.get_version()
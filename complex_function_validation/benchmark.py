@@ -0,0 +1,79 @@
+"""Throughput benchmarks of array library functions.
+
+For instance, the following measures the throughput of numpy.arcsinh
+on complex64 planes of various sizes:
+
+  >>> import complex_function_validation as cfv
+  >>> from complex_function_validation.benchmark import benchmark, summary
+  >>> print(summary(benchmark(cfv.NumpyFunction('arcsinh', 'complex64'))))
+"""
+
+import time
+
+import numpy
+
+# sizes of ComplexPlaneSampler grids, the number of samples is
+# (3 + 2 * size) ** 2
+default_sizes = (40, 200, 1000)
+
+
+def latencies(function, np_samples, warmup=3, repeat=10):
+    """Return an array of function evaluation times in seconds on
+    samples.
+
+    Samples are converted to function arrays before timing and the
+    device is synchronized after each evaluation, see
+    `Function.synchronize`.
+    """
+    dtype = {'c': function.dtype, 'f': function.real_dtype}[np_samples.dtype.kind]
+    result = numpy.empty(repeat)
+    with function.context:
+        samples = function.from_numpy(np_samples, dtype=dtype)
+        for i in range(warmup):
+            function(samples)
+        function.synchronize()
+        for i in range(repeat):
+            start = time.perf_counter()
+            function(samples)
+            function.synchronize()
+            result[i] = time.perf_counter() - start
+    return result
+
+
+def benchmark(function, sizes=default_sizes, warmup=3, repeat=10, percentiles=(50, 90, 99)):
+    """Return throughput and latency percentiles of function on
+    complex planes of given sizes.
+
+    The result is a list of dictionaries with keys size, samples,
+    samples_per_second (using median latency), and latency_p<q> in
+    seconds, one for each size.
+    """
+    from . import ComplexPlaneSampler
+    sampler = ComplexPlaneSampler(function.numpy_dtype)
+    results = []
+    for size in sizes:
+        np_samples = sampler(size, size)
+        times = latencies(function, np_samples, warmup=warmup, repeat=repeat)
+        result = dict(size=size, samples=np_samples.size,
+                      samples_per_second=np_samples.size / numpy.median(times))
+        for q, t in zip(percentiles, numpy.percentile(times, percentiles)):
+            result[f'latency_p{q}'] = float(t)
+        results.append(result)
+    return results
+
+
+def summary(results):
+    """Return benchmark results as text, one line per size.
+
+    Results of JAX functions include the throughput without the jit
+    cache under key uncached_samples_per_second, see `run.worker`.
+    """
+    lines = []
+    for result in results:
+        latency = ', '.join(f'{key[8:]} {1e3 * value:.3g} ms' for key, value in result.items()
+                            if key.startswith('latency_'))
+        line = f'{result["samples"]} samples: {result["samples_per_second"]:.3g} samples/s, latency {latency}'
+        if 'uncached_samples_per_second' in result:
+            line += f', {result["uncached_samples_per_second"]:.3g} samples/s without jit cache'
+        lines.append(line)
+    return '\n'.join(lines)
@@ -0,0 +1,207 @@
+"""Caches of function values.
+"""
+
+import os
+import json
+import hashlib
+from collections import OrderedDict
+
+import numpy
+
+
+def samples_digest(np_samples):
+    """Return a digest of samples content including its dtype and shape.
+    """
+    np_samples = numpy.ascontiguousarray(np_samples)
+    h = hashlib.sha256()
+    h.update(f'{np_samples.dtype.str}{np_samples.shape}'.encode())
+    h.update(np_samples.data)
+    return h.hexdigest()
+
+
+class ReferenceCache:
+    """A content-addressed on-disk cache of function values.
+
+    Values are stored as .npy files in the given directory and are
+    loaded as read-only memory maps. When the total size of the cached
+    files exceeds max_bytes, the least recently used files are
+    removed.
+    """
+
+    def __init__(self, directory, max_bytes=4 * 2 ** 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.directory!r}, max_bytes={self.max_bytes})'
+
+    def key(self, np_samples, **params):
+        """Return a key for the values of a function on the given samples.
+
+        The key is a digest of the samples content and the parameters
+        that define the function evaluation, such as function name,
+        dtype, precision, and library version.
+        """
+        h = hashlib.sha256()
+        h.update(json.dumps(params, sort_keys=True).encode())
+        h.update(samples_digest(np_samples).encode())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.npy')
+
+    def get(self, key):
+        """Return cached values as a read-only memory map or None when
+        the key is not in cache.
+        """
+        path = self._path(key)
+        try:
+            values = numpy.load(path, mmap_mode='r')
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return values
+
+    def put(self, key, values):
+        """Store values in cache and evict least recently used entries
+        when cache size limit is exceeded.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as fd:
+            numpy.save(fd, numpy.ascontiguousarray(values))
+        os.replace(tmp, path)
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.npy'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+
+    def stats_summary(self):
+        return f'reference cache: {self.hits} hits, {self.misses} misses, {self.evictions} evictions'
+
+
+class EvaluationMemo:
+    """An in-memory LRU memo of function values.
+
+    The memo is keyed by function, dtype, and samples content so that
+    a function is evaluated only once on the same grid. Values on a
+    grid that is a subgrid of a memoized grid, see
+    `ComplexPlaneSampler(..., nested=True)`, are taken from the
+    memoized values. When the total size of memoized values and
+    samples exceeds max_bytes, the least recently used entries are
+    dropped. Memoized values are read-only.
+    """
+
+    def __init__(self, max_bytes=2 ** 30):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.subgrid_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __repr__(self):
+        return f'{type(self).__name__}(max_bytes={self.max_bytes})'
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, function, np_samples, numpy_dtype):
+        return (type(function).__name__, function._name, function._dtype, function._device,
+                numpy.dtype(numpy_dtype).str, samples_digest(np_samples))
+
+    def evaluate(self, function, np_samples, numpy_dtype):
+        """Return function values on samples, evaluate function only
+        when the values are not memoized.
+        """
+        key = self.key(function, np_samples, numpy_dtype)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        np_values = self._subgrid_values(key, np_samples)
+        if np_values is not None:
+            self.subgrid_hits += 1
+            return np_values
+        self.misses += 1
+        np_values = function.evaluate(np_samples, numpy_dtype)
+        self.put(key, np_values, np_samples)
+        return np_values
+
+    def _subgrid_values(self, key, np_samples):
+        if np_samples.ndim != 2 or np_samples.size == 0:
+            return
+
+        def axes(samples):
+            cols = samples[0].real
+            rows = samples[:, 0].imag if samples.dtype.kind == 'c' else samples[:, 0]
+            return rows, cols
+
+        def find(points, fine_points):
+            order = numpy.argsort(fine_points, kind='stable')
+            indices = order[numpy.searchsorted(fine_points, points, sorter=order).clip(0, len(order) - 1)]
+            if numpy.array_equal(fine_points[indices], points):
+                return indices
+
+        rows, cols = axes(np_samples)
+        for fine_key, (fine_values, fine_samples) in reversed(self._entries.items()):
+            if fine_key[:-1] != key[:-1] or fine_samples.ndim != 2 or fine_samples.dtype != np_samples.dtype:
+                continue
+            fine_rows, fine_cols = axes(fine_samples)
+            row_indices, col_indices = find(rows, fine_rows), find(cols, fine_cols)
+            if row_indices is None or col_indices is None:
+                continue
+            index = numpy.ix_(row_indices, col_indices)
+            samples = fine_samples[index]
+            if samples.tobytes() == numpy.ascontiguousarray(np_samples).tobytes():
+                self._entries.move_to_end(fine_key)
+                np_values = fine_values[index]
+                np_values.flags.writeable = False
+                return np_values
+
+    def put(self, key, np_values, np_samples):
+        np_samples = numpy.array(np_samples)
+        nbytes = np_values.nbytes + np_samples.nbytes
+        if nbytes > self.max_bytes:
+            return
+        np_values.flags.writeable = False
+        if key in self._entries:
+            self.nbytes -= sum(a.nbytes for a in self._entries.pop(key))
+        self._entries[key] = np_values, np_samples
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, dropped = self._entries.popitem(last=False)
+            self.nbytes -= sum(a.nbytes for a in dropped)
+
+    def stats_summary(self):
+        return (f'evaluation memo: {self.hits} hits, {self.subgrid_hits} subgrid hits,'
+                f' {self.misses} misses, {self.nbytes} bytes')
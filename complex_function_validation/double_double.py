@@ -0,0 +1,400 @@
+"""Double-double reference functions
+
+This module provides vectorized implementations of elementary
+functions on complex and real arguments that are accurate enough for
+computing correctly rounded float32 and complex64 values.
+
+The functions are evaluated in float64 arithmetic, error-free
+transformations (double-double arithmetic) are used in expressions
+that are prone to cancellations. Each function returns a pair of
+values and absolute error bounds of the values. The error bounds are
+used in `round_float32` to detect the samples for which rounding to
+float32 is ambiguous and that must be evaluated with a more
+accurate reference function, see `DoubleDoubleFunction`.
+"""
+
+__version__ = '0.1'
+
+import math
+import numpy
+
+# unit roundoff of float64
+eps = 2.0 ** -53
+
+# relative error bound of expressions that are composed from a few
+# arithmetic operations and libm functions
+rtol = 2.0 ** 8 * eps
+
+# constants defining the regions of Hull et al algorithm, see _asin
+_asin_b_cross = 0.6417
+_asin_a_cross = 1.5
+
+
+def two_sum(a, b):
+    """Return s, e such that s == fl(a + b) and s + e == a + b exactly.
+    """
+    s = a + b
+    bb = s - a
+    return s, (a - (s - bb)) + (b - bb)
+
+
+def split(a):
+    """Return hi, lo such that hi + lo == a and hi, lo have at most 26
+    significant bits.
+    """
+    c = 134217729.0 * a  # 2 ** 27 + 1
+    hi = c - (c - a)
+    return hi, a - hi
+
+
+def two_prod(a, b):
+    """Return p, e such that p == fl(a * b) and p + e == a * b exactly.
+    """
+    p = a * b
+    ahi, alo = split(a)
+    bhi, blo = split(b)
+    return p, ((ahi * bhi - p) + ahi * blo + alo * bhi) + alo * blo
+
+
+def make_complex(real, imag):
+    result = numpy.empty(numpy.broadcast(real, imag).shape, dtype=numpy.complex128)
+    result.real = real
+    result.imag = imag
+    return result
+
+
+def is_supported(samples):
+    """Return a mask of samples with finite and non-zero components
+    that are within the range of float32.
+
+    Samples with zero components (including the samples on branch
+    cuts and samples with signed zeros), and samples with non-finite
+    components are not supported.
+    """
+    parts = (samples.real, samples.imag) if samples.dtype.kind == 'c' else (samples,)
+    mask = numpy.ones(samples.shape, dtype=bool)
+    for part in parts:
+        part = numpy.absolute(part)
+        mask &= (part >= 2.0 ** -150) & (part <= 2.0 ** 128)
+    return mask
+
+
+def round_float32(values, errors):
+    """Return values rounded to float32 or complex64 and a mask of
+    values that are correctly rounded.
+
+    A value is correctly rounded when the interval defined by the
+    value and its error bound rounds to a single float32 value,
+    including its sign.
+    """
+
+    def round_part(value, error):
+        error = numpy.where(numpy.isinf(value), 0, numpy.maximum(error, eps * numpy.absolute(value)))
+        # value - 0 would change the sign of -0.0
+        lower = numpy.where(error > 0, value - 2 * error, value).astype(numpy.float32)
+        upper = numpy.where(error > 0, value + 2 * error, value).astype(numpy.float32)
+        certain = (lower == upper) & (numpy.signbit(lower) == numpy.signbit(upper))
+        return value.astype(numpy.float32), certain
+
+    with numpy.errstate(all='ignore'):
+        if values.dtype.kind == 'c':
+            real, real_certain = round_part(values.real, errors.real)
+            imag, imag_certain = round_part(values.imag, errors.imag)
+            result = numpy.empty(values.shape, dtype=numpy.complex64)
+            result.real = real
+            result.imag = imag
+            return result, real_certain & imag_certain
+        return round_part(values, errors)
+
+
+def _log(x, y):
+    # log(|z|) with |z|**2 - 1 evaluated in double-double arithmetic
+    # when |z| is close to 1
+    h = numpy.hypot(x, y)
+    xx, xx_lo = two_prod(x, x)
+    yy, yy_lo = two_prod(y, y)
+    s, e = two_sum(xx, -1.0)
+    s, e2 = two_sum(s, yy)
+    t, t_lo = two_sum(s, e + e2 + xx_lo + yy_lo)
+    near = (h > 0.5) & (h < 2)
+    re = numpy.where(near, 0.5 * (numpy.log1p(t) + t_lo / (1 + t)), numpy.log(h))
+    re_err = rtol * numpy.absolute(re) + numpy.where(near, 8 * eps ** 2 * (xx + yy + 1), 0)
+    im = numpy.arctan2(y, x)
+    return re, im, re_err, rtol * numpy.absolute(im)
+
+
+def _tanh(x, y):
+    small = numpy.absolute(x) <= 20
+    sx, cx = numpy.sinh(x), numpy.cosh(x)
+    sy, cy = numpy.sin(y), numpy.cos(y)
+    # cosh(2 x) + cos(2 y) == 2 * (sinh(x) ** 2 + cos(y) ** 2)
+    d = sx * sx + cy * cy
+    ex = numpy.exp(-2 * numpy.absolute(x))
+    re = numpy.where(small, sx * cx / d, numpy.copysign(1.0, x))
+    im = numpy.where(small, sy * cy / d, 4 * sy * cy * ex)
+    re_err = numpy.where(small, rtol * numpy.absolute(re), 4 * ex)
+    return re, im, re_err, rtol * numpy.absolute(im)
+
+
+def _asin(x, y):
+    # Hull, Fairgrieve, Tang, Implementing the complex arcsine and
+    # arccosine functions using exception handling, 1997.
+    # Returns the real parts of asin and acos, and the imaginary part
+    # of asin of abs(x) + abs(y) * 1j.
+    x, y = numpy.absolute(x), numpy.absolute(y)
+    r = numpy.hypot(x + 1, y)
+    s = numpy.hypot(x - 1, y)
+    a = 0.5 * (r + s)
+    b = x / a
+    yy = y * y
+    below = x <= 1
+    am1 = numpy.where(below,
+                      0.5 * (yy / (r + (x + 1)) + yy / (s + (1 - x))),
+                      0.5 * (yy / (r + (x + 1)) + (s + (x - 1))))
+    im = numpy.where(a <= _asin_a_cross, numpy.log1p(am1 + numpy.sqrt(am1 * (a + 1))), numpy.log(a + numpy.sqrt(a * a - 1)))
+    q = numpy.where(below,
+                    numpy.sqrt(0.5 * (a + x) * (yy / (r + (x + 1)) + (s + (1 - x)))),
+                    y * numpy.sqrt(0.5 * ((a + x) / (r + (x + 1)) + (a + x) / (s + (x - 1)))))
+    cross = b > _asin_b_cross
+    re_asin = numpy.where(cross, numpy.arctan2(x, q), numpy.arcsin(b))
+    re_acos = numpy.where(cross, numpy.arctan2(q, x), numpy.arccos(b))
+    return re_asin, re_acos, im
+
+
+def _atanh(x, y):
+    # Returns the real and imaginary parts of atanh of abs(x) +
+    # abs(y) * 1j, the denominator of the imaginary part, 1 - |z|**2,
+    # is evaluated in double-double arithmetic.
+    x, y = numpy.absolute(x), numpy.absolute(y)
+    re = 0.25 * numpy.log1p(4 * x / ((1 - x) ** 2 + y * y))
+    xx, xx_lo = two_prod(x, x)
+    yy, yy_lo = two_prod(y, y)
+    s, e = two_sum(1.0, -xx)
+    s, e2 = two_sum(s, -yy)
+    d, d_lo = two_sum(s, e + e2 - xx_lo - yy_lo)
+    im = 0.5 * (numpy.arctan2(2 * y, d) - 2 * y * d_lo / (4 * yy + d * d))
+    return re, im
+
+
+def _complex_result(re, im, re_err=None, im_err=None):
+    if re_err is None:
+        re_err = rtol * numpy.absolute(re)
+    if im_err is None:
+        im_err = rtol * numpy.absolute(im)
+    return make_complex(re, im), make_complex(re_err, im_err)
+
+
+def _real_result(value, err=None):
+    if err is None:
+        err = rtol * numpy.absolute(value)
+    return value, err
+
+
+def abs(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.absolute(z), 0)
+    return _complex_result(numpy.hypot(z.real, z.imag), numpy.zeros(z.shape))
+
+
+def exp(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.exp(z))
+    x, y = z.real, z.imag
+    e = numpy.exp(x)
+    return _complex_result(e * numpy.cos(y), e * numpy.sin(y))
+
+
+def expm1(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.expm1(z))
+    x, y = z.real, z.imag
+    # exp(x) * cos(y) - 1 == expm1(x) * cos(y) - 2 * sin(y / 2) ** 2
+    t1 = numpy.expm1(x) * numpy.cos(y)
+    t2 = -2 * numpy.sin(0.5 * y) ** 2
+    re = t1 + t2
+    return _complex_result(re, numpy.exp(x) * numpy.sin(y), rtol * (numpy.absolute(t1) + numpy.absolute(t2)))
+
+
+def log(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.log(z))
+    return _complex_result(*_log(z.real, z.imag))
+
+
+def log10(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.log10(z))
+    re, im, re_err, im_err = _log(z.real, z.imag)
+    c = 0.4342944819032518
+    return _complex_result(c * re, c * im, c * re_err, c * im_err)
+
+
+def log2(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.log2(z))
+    re, im, re_err, im_err = _log(z.real, z.imag)
+    c = 1.4426950408889634
+    return _complex_result(c * re, c * im, c * re_err, c * im_err)
+
+
+def log1p(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.log1p(z))
+    x, y = z.real, z.imag
+    # log(|1 + z|) == 0.5 * log1p(2 * x + x ** 2 + y ** 2)
+    xx, xx_lo = two_prod(x, x)
+    yy, yy_lo = two_prod(y, y)
+    s, e = two_sum(2 * x, xx)
+    s, e2 = two_sum(s, yy)
+    t, t_lo = two_sum(s, e + e2 + xx_lo + yy_lo)
+    re = 0.5 * (numpy.log1p(t) + t_lo / (1 + t))
+    re_err = rtol * numpy.absolute(re) + 8 * eps ** 2 * (numpy.absolute(2 * x) + xx + yy) / (1 + t)
+    return _complex_result(re, numpy.arctan2(y, 1 + x), re_err)
+
+
+def sqrt(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.sqrt(z))
+    x, y = z.real, z.imag
+    t = numpy.sqrt(0.5 * (numpy.absolute(x) + numpy.hypot(x, y)))
+    u = 0.5 * numpy.absolute(y) / t
+    positive = x >= 0
+    return _complex_result(numpy.where(positive, t, u), numpy.copysign(numpy.where(positive, u, t), y))
+
+
+def square(z):
+    if z.dtype.kind == 'f':
+        return _real_result(z * z, 0)
+    x, y = z.real, z.imag
+    xx, xx_lo = two_prod(x, x)
+    yy, yy_lo = two_prod(y, y)
+    s, e = two_sum(xx, -yy)
+    xy, xy_lo = two_prod(x, y)
+    return _complex_result(s + (e + (xx_lo - yy_lo)), 2 * xy,
+                           4 * eps * (numpy.absolute(xx_lo) + numpy.absolute(yy_lo)), 2 * numpy.absolute(xy_lo))
+
+
+def sin(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.sin(z))
+    x, y = z.real, z.imag
+    return _complex_result(numpy.sin(x) * numpy.cosh(y), numpy.cos(x) * numpy.sinh(y))
+
+
+def cos(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.cos(z))
+    x, y = z.real, z.imag
+    return _complex_result(numpy.cos(x) * numpy.cosh(y), -numpy.sin(x) * numpy.sinh(y))
+
+
+def tan(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.tan(z))
+    # tan(z) == -1j * tanh(1j * z)
+    re, im, re_err, im_err = _tanh(-z.imag, z.real)
+    return _complex_result(im, -re, im_err, re_err)
+
+
+def arcsin(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.arcsin(z))
+    x, y = z.real, z.imag
+    re, _, im = _asin(x, y)
+    return _complex_result(numpy.copysign(re, x), numpy.copysign(im, y))
+
+
+def arccos(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.arccos(z))
+    x, y = z.real, z.imag
+    _, re, im = _asin(x, y)
+    return _complex_result(numpy.where(x >= 0, re, numpy.pi - re), -numpy.copysign(im, y))
+
+
+def arctan(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.arctan(z))
+    x, y = z.real, z.imag
+    # atan(z) == -1j * atanh(1j * z)
+    re, im = _atanh(y, x)
+    return _complex_result(numpy.copysign(im, x), numpy.copysign(re, y))
+
+
+def sinh(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.sinh(z))
+    x, y = z.real, z.imag
+    return _complex_result(numpy.sinh(x) * numpy.cos(y), numpy.cosh(x) * numpy.sin(y))
+
+
+def cosh(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.cosh(z))
+    x, y = z.real, z.imag
+    return _complex_result(numpy.cosh(x) * numpy.cos(y), numpy.sinh(x) * numpy.sin(y))
+
+
+def tanh(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.tanh(z))
+    return _complex_result(*_tanh(z.real, z.imag))
+
+
+def arcsinh(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.arcsinh(z))
+    x, y = z.real, z.imag
+    # asinh(z) == -1j * asin(1j * z)
+    re, _, im = _asin(y, x)
+    return _complex_result(numpy.copysign(im, x), numpy.copysign(re, y))
+
+
+def arccosh(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.arccosh(z))
+    x, y = z.real, z.imag
+    # acosh(z) == +-1j * acos(z)
+    _, re, im = _asin(x, y)
+    return _complex_result(im, numpy.copysign(numpy.where(x >= 0, re, numpy.pi - re), y))
+
+
+def arctanh(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.arctanh(z))
+    x, y = z.real, z.imag
+    re, im = _atanh(x, y)
+    return _complex_result(numpy.copysign(re, x), numpy.copysign(im, y))
+
+
+def sinc(z):
+    if z.dtype.kind == 'f':
+        return _real_result(numpy.sin(z) / z)
+    x, y = z.real, z.imag
+    n = x * x + y * y
+    sx, cx = numpy.sin(x), numpy.cos(x)
+    large = numpy.absolute(y) > 20
+    # cosh(y) and sinh(y) are approximated with exp(|y|) / 2 for large
+    # y so that sin(z) / z does not overflow prematurely
+    scale = numpy.where(large, numpy.exp(numpy.absolute(y) - numpy.log(2)), 1)
+    a = numpy.where(large, sx, sx * numpy.cosh(y))
+    b = numpy.where(large, cx * numpy.sign(y), cx * numpy.sinh(y))
+    re = (a * x + b * y) / n * scale
+    im = (b * x - a * y) / n * scale
+    re_err = rtol * (numpy.absolute(a * x) + numpy.absolute(b * y)) / n * scale
+    im_err = rtol * (numpy.absolute(b * x) + numpy.absolute(a * y)) / n * scale
+    # sin(z) / z suffers from cancellations when z is small, use
+    # Taylor series of sinc(z) in z ** 2 for |z| < 1
+    small = n < 1
+    xx, xx_lo = two_prod(x, x)
+    yy, yy_lo = two_prod(y, y)
+    w = make_complex(xx - yy + (xx_lo - yy_lo), 2 * x * y)
+    series = numpy.zeros(z.shape, dtype=numpy.complex128)
+    for k in range(12, 0, -1):
+        series = (series + (-1) ** k / math.factorial(2 * k + 1)) * w
+    series += 1
+    re = numpy.where(small, series.real, re)
+    im = numpy.where(small, series.imag, im)
+    re_err = numpy.where(small, rtol * numpy.absolute(series.real), re_err)
+    im_err = numpy.where(small, rtol * numpy.absolute(series.imag), im_err)
+    return _complex_result(re, im, re_err, im_err)
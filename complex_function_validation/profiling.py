@@ -0,0 +1,121 @@
+"""Lightweight profiling of the phases of report generation.
+
+Phases are timed with the `phase` context manager and events are
+counted with `count`:
+
+  >>> from complex_function_validation import profiling
+  >>> profile = profiling.enable()
+  >>> with profiling.phase('sampling'):
+  ...     samples = ComplexPlaneSampler(numpy.complex64)(100, 100)
+  >>> profiling.count('samples', samples.size)
+  >>> profiling.disable().dump()
+
+Timings and counts are passed to a sink that is set with `enable`,
+by default, a `Profile` instance. Any object with `add_time(name,
+elapsed)` and `add_count(name, n)` methods can be used as a sink.
+Phases may nest, the elapsed time of a phase includes the time of
+its inner phases. When profiling is disabled (the default), `phase`
+returns a shared null context and `count` returns immediately.
+"""
+
+import time
+import contextlib
+
+_sink = None
+_null_context = contextlib.nullcontext()
+
+
+class Profile:
+    """A sink that accumulates the number of calls and the elapsed
+    time of phases, and counters.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+
+    def __repr__(self):
+        return f'{type(self).__name__}()'
+
+    def add_time(self, name, elapsed):
+        item = self.phases.get(name)
+        if item is None:
+            self.phases[name] = [1, elapsed]
+        else:
+            item[0] += 1
+            item[1] += elapsed
+
+    def add_count(self, name, n):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other):
+        """Merge phases and counters of other profile into self.
+        """
+        for name, (calls, elapsed) in other.phases.items():
+            item = self.phases.setdefault(name, [0, 0.0])
+            item[0] += calls
+            item[1] += elapsed
+        for name, n in other.counters.items():
+            self.add_count(name, n)
+        return self
+
+    def dump(self):
+        """Return profile as a JSON serializable dictionary.
+        """
+        return dict(phases={name: dict(calls=calls, seconds=elapsed) for name, (calls, elapsed) in self.phases.items()},
+                    counters=dict(self.counters))
+
+    @classmethod
+    def load(cls, state):
+        profile = cls()
+        profile.phases = {name: [item['calls'], item['seconds']] for name, item in state['phases'].items()}
+        profile.counters = dict(state['counters'])
+        return profile
+
+
+class _Timer:
+
+    __slots__ = ('sink', 'name', 'start')
+
+    def __init__(self, sink, name):
+        self.sink = sink
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.sink.add_time(self.name, time.perf_counter() - self.start)
+
+
+def enable(sink=None):
+    """Enable profiling with given sink, defaults to a new Profile
+    instance. Return the sink.
+    """
+    global _sink
+    _sink = Profile() if sink is None else sink
+    return _sink
+
+
+def disable():
+    """Disable profiling and return the sink.
+    """
+    global _sink
+    sink, _sink = _sink, None
+    return sink
+
+
+def phase(name):
+    """Return a context manager that times a phase.
+    """
+    if _sink is None:
+        return _null_context
+    return _Timer(_sink, name)
+
+
+def count(name, n=1):
+    """Add n to the counter with given name.
+    """
+    if _sink is not None:
+        _sink.add_count(name, n)
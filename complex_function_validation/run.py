@@ -1,4 +1,7 @@
 import os
+import json
+import time
+import hashlib
 import numpy
 import warnings
 from multiprocessing import Pool, set_start_method
@@ -25,73 +28,186 @@ dtype_list = ['complex64', 'complex128']
 device_list = ['cpu', 'cuda']
 
 
-def worker(args):
-    array_libraries, index, fname, size_re, size_im, size_re2, size_im2, try_run = args
-    warnings.simplefilter("ignore")
+def tool_version():
+    """Return a digest of the tool sources.
+    """
+    h = hashlib.sha256()
+    package_dir = os.path.dirname(cfv.__file__)
+    for fn in sorted(os.listdir(package_dir)):
+        if fn.endswith('.py') and fn != 'tests.py':
+            with open(os.path.join(package_dir, fn), 'rb') as fd:
+                h.update(fn.encode())
+                h.update(fd.read())
+    return h.hexdigest()[:16]
+
+
+def cell_fingerprint(**params):
+    """Return a fingerprint of result cell parameters.
+
+    The parameters include the function name, the reference and
+    target library versions, dtypes, and devices, the grid parameters,
+    and the tool version so that a result cell with the same
+    fingerprint need not be regenerated.
+    """
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
 
+
+def reference_functions(fname, cache_dir=None, max_precision=None, fast_reference=False):
+    """Return reference functions for complex128 and complex64 targets.
+    """
     if mpmath is not None:
-        ref = cfv.MPMathFunction(fname, 'complex128')
+        cache = cfv.ReferenceCache(cache_dir) if cache_dir is not None else None
+        ref = cfv.MPMathFunction(fname, 'complex128', cache=cache, max_precision=max_precision)
     else:
         ref = cfv.NumpyFunction(fname, 'complex128')
 
-    functions = []
+    # reference values for complex64 targets are computed in
+    # double-double arithmetic, mpmath is used only for the samples
+    # that double-double function does not support
+    ref32 = cfv.DoubleDoubleFunction(fname, 'complex128', fallback=ref) if fast_reference else ref
+    return ref, ref32
 
-    for cls in [item[1] for item in array_libraries[1:] if item[-1] is not None]:
-        for dtype in dtype_list:
-            for device in device_list:
-                functions.append(cls(fname, dtype, device))
-
-    cols = [fname]
-    targets = {}
-    for f in functions:
-        if not f.is_valid:
-            cols.append('N/A')
-            continue
-
-        image = cfv.ReportImage()
-        image.generate_report(ref, [f], size_re=size_re, size_im=size_im)
-        image.insert_text(-1, 0, f'\nVersions:\n    {ref.get_module_version()}')
-        image.insert_text(-1, 0, f'    {f.get_module_version()}\n ')
-        image.insert_legend(-1, 10)
-        image.insert_text(-1, 0, '')
-        image.insert_samples(-1, 0, 'xXIN23456789ABCDEFM')
-
-        fn = f'{fname}_{ref.library_name}_{ref._dtype}_{ref._device}_versus_{f.library_name}_{f._dtype}_{f._device}.txt'
-        print(fn)
-        targets[fn] = str(image)
-
-        if try_run:
-            continue
-
-        # for better statistics:
-        image = cfv.ReportImage()
-        image.generate_report(ref, [f], size_re=size_re2, size_im=size_im2)
-        print('ok')
-        stats = image.get_stats()[0]
-
-        matches_rating = 100 * stats['matches'] / stats['total']
-        inaccuracies_rating = 100 * stats['inaccuracies'] / stats['total']
-        mismatches_rating = 100 * stats['mismatches'] / stats['total']
-
-        if matches_rating == 100 and stats['inaccuracies']==0 and stats['mismatches'] == 0:
-            rating = 'PERFECT'
-        elif matches_rating == 100:
-            rating = 'OK'
-        elif matches_rating > 90:
-            rating = 'GOOD'
-        elif mismatches_rating > 50:
-            rating = 'BAD'
-        else:
-            rating = 'POOR'
-        cols.append(f'{rating} [{matches_rating:.0f}/{inaccuracies_rating:.0f}/{mismatches_rating:.0f} %](data/{os.path.basename(fn)})')
-
-    return ' | '.join([''] + cols + ['']), targets
-
-def main_results(array_libraries, target_dir='cfv_results', try_run=False):
-    pool_size = 20
+
+def worker(args):
+    """Evaluate the passes of the result cells of a function and dtype.
+
+    The targets of a task share the reference function and an
+    evaluation memo so that a reference grid is evaluated once per
+    task for all targets. Return the task key, a dictionary of image
+    dumps per cell name, the profile of the task (None when profile
+    is False), and the elapsed time. The benchmark pass results are
+    stored in the image dumps of a cell under 'benchmark' key, see
+    `benchmark.benchmark`. When daz is True, the DAZ behavior of
+    target devices is modeled, see `Function.apply_daz`.
+    """
+    (key, fname, dtype, targets, passes, size_re, size_im, size_re2, size_im2,
+     cache_dir, nested, fast_reference, max_precision, tile_size, benchmark_sizes, profile, daz) = args
+    warnings.simplefilter("ignore")
+    start = time.time()
+    if profile:
+        cfv.profiling.enable()
+
+    ref, ref32 = reference_functions(fname, cache_dir=cache_dir, max_precision=max_precision,
+                                     fast_reference=fast_reference)
+    f_ref = ref32 if dtype == 'complex64' else ref
+
+    # reference values are shared between targets, and with nested
+    # samples, the values of the report grid are taken from the
+    # values of the statistics grid
+    memo = cfv.EvaluationMemo()
+
+    images = {}
+    for name, cls, device in targets:
+        f = cls(fname, dtype, device, daz=daz)
+        cell_images = images[name] = {}
+        if 'stats' in passes:
+            # for better statistics:
+            image = cfv.ReportImage()
+            image.generate_report(f_ref, [f], size_re=size_re2, size_im=size_im2, memo=memo, nested=nested,
+                                  tile_size=tile_size)
+            print('ok')
+            with cfv.profiling.phase('dump'):
+                cell_images['stats'] = image.dump(values=False)
+
+        if 'report' in passes:
+            image = cfv.ReportImage()
+            image.generate_report(f_ref, [f], size_re=size_re, size_im=size_im, memo=memo, nested=nested)
+            image.insert_text(-1, 0, f'\nVersions:\n    {ref.get_module_version()}')
+            image.insert_text(-1, 0, f'    {f.get_module_version()}\n ')
+            image.insert_legend(-1, 10)
+            image.insert_text(-1, 0, '')
+            image.insert_samples(-1, 0, 'xXIN23456789ABCDEFM')
+            with cfv.profiling.phase('dump'):
+                cell_images['report'] = image.dump()
+            print(f'{name}.txt')
+
+        if 'benchmark' in passes:
+            cell_images['benchmark'] = cfv.benchmark.benchmark(f, sizes=benchmark_sizes)
+            if isinstance(f, cfv.JaxNumpyFunction):
+                # the throughput without the jit cache for comparison
+                uncached = cfv.benchmark.benchmark(cls(fname, dtype, device, jit=False), sizes=benchmark_sizes)
+                for result, uncached_result in zip(cell_images['benchmark'], uncached):
+                    result['uncached_samples_per_second'] = uncached_result['samples_per_second']
+            print(f'{name}:\n{cfv.benchmark.summary(cell_images["benchmark"])}')
+
+        if isinstance(f, cfv.JaxNumpyFunction):
+            print(f'{name}: {f.stats_summary()}')
+
+    if getattr(ref, 'cache', None) is not None:
+        print(f'{key}: {ref.cache.stats_summary()}')
+    if getattr(ref, 'escalations', None):
+        print(f'{key}: {ref.stats_summary()}')
+    print(f'{key}: {memo.stats_summary()}')
+    task_profile = cfv.profiling.disable().dump() if profile else None
+
+    return key, images, task_profile, time.time() - start
+
+
+def valid_targets(cls, fnames):
+    """Return the set of (function name, dtype, device) of valid
+    target functions of a Function subclass.
+    """
+    return {(fname, dtype, device) for fname in fnames for dtype in dtype_list for device in device_list
+            if cls(fname, dtype, device).is_valid}
+
+
+def rating_cell(stats, fn, benchmark=None):
+    """Return README table cell of statistics and, when specified,
+    the throughput on the largest benchmark grid.
+    """
+    matches_rating = 100 * stats['matches'] / stats['total']
+    inaccuracies_rating = 100 * stats['inaccuracies'] / stats['total']
+    mismatches_rating = 100 * stats['mismatches'] / stats['total']
+
+    if matches_rating == 100 and stats['inaccuracies']==0 and stats['mismatches'] == 0:
+        rating = 'PERFECT'
+    elif matches_rating == 100:
+        rating = 'OK'
+    elif matches_rating > 90:
+        rating = 'GOOD'
+    elif mismatches_rating > 50:
+        rating = 'BAD'
+    else:
+        rating = 'POOR'
+    cell = (f'{rating} [{matches_rating:.0f}/{inaccuracies_rating:.0f}/{mismatches_rating:.0f} %,'
+            f' {stats["ulp_max"]:.3g}/{stats["ulp_p99"]:.3g} ULP](data/{fn})')
+    if benchmark:
+        result = benchmark[-1]
+        cell += (f'<br>{result["samples_per_second"] / 1e6:.3g} M/s,'
+                 f' {1e3 * result["latency_p50"]:.3g}/{1e3 * result["latency_p99"]:.3g} ms')
+    return cell
+
+def main_results(array_libraries, target_dir='cfv_results', try_run=False, cache_dir=None, nested=False, fast_reference=False, max_precision=None,
+                 tile_size=None, stats_size=None, incremental=True, processes=None, benchmark_sizes=None,
+                 profile=False, daz=False):
+    """Generate results of comparing array library functions against
+    reference functions in target_dir.
+
+    The work is split into (function, dtype, pass) tasks that are
+    evaluated in a process pool, longest tasks first according to the
+    task timings from previous runs, see `timings.json` in
+    target_dir. The targets of a task share the reference values,
+    see `worker`. The results of a cell are saved as soon as all its
+    tasks are finished.
+
+    When benchmark_sizes is specified, the throughput of target
+    functions is measured on grids of given sizes in separate tasks,
+    see `benchmark.benchmark`. Use processes=1 for timings that are
+    not disturbed by concurrent tasks.
+
+    When profile is True, the phases of tasks are timed, see
+    `profiling`, and the per-function profiles of the tasks that were
+    run are written to `profile.json` in target_dir.
+
+    When daz is True, reference functions are evaluated on flushed
+    samples for target devices that treat subnormal inputs as zeros,
+    see `Function.apply_daz`.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
     for name, _, version in array_libraries:
         if name == 'JAX':
-            pool_size = 2
+            processes = min(processes, 2)
         if version is not None and 'dev' in version:
             target_dir += '_dev'
             break
@@ -101,38 +217,129 @@ def main_results(array_libraries, target_dir='cfv_results', try_run=False):
         size_re = size_im = 12
     else:
         size_re = size_im = 40
-    size_re2 = size_im2 = 200
+    if nested:
+        # the report grid is a subgrid of the statistics grid
+        size_re2, size_im2 = 5 * (size_re - 1) + 1, 5 * (size_im - 1) + 1
+    else:
+        size_re2 = size_im2 = 200
+    if stats_size is not None:
+        size_re2 = size_im2 = stats_size
     
     column_labels = ['Function']
     for lname, cls in [item[:2] for item in array_libraries[1:] if item[-1] is not None]:
         for dtype in dtype_list:
             for device in device_list:
-                column_labels.append(f'{lname} {device}: {dtype}' + (' FTZ' if cls.apply_ftz(device) else ''))
+                column_labels.append(f'{lname} {device}: {dtype}' + (' FTZ' if cls.apply_ftz(device) else '')
+                                     + (' DAZ' if cls(function_names[0], dtype, device, daz=daz).apply_daz(device) else ''))
 
-    rows = [' | '.join([''] + column_labels + [''])]
-    rows += [' | '.join(['', ':----'] + [':----:'] * (len(column_labels)-1) + [''])]
-
-    args = []
-    for index, fname in enumerate(function_names):
-        args.append(
-            (array_libraries, index, fname,
-             size_re, size_im, size_re2, size_im2, try_run)
-        )
-    with Pool(min(pool_size, len(function_names))) as p:
-        for row, targets in p.map(worker, args):
-            rows.append(row)
-            for fn, content in targets.items():
-                if try_run:
-                    print(fn)
-                    print(content)
-                else:
-                    fn = os.path.join(target_dir, 'data', fn)
-                    fd = open(fn, 'w')
-                    fd.write(content)
-                    fd.close()
+    if try_run:
+        passes_list = [('report',)]
+    elif nested:
+        # the passes share evaluations via memo
+        passes_list = [('stats', 'report')]
+    else:
+        passes_list = [('stats',), ('report',)]
+    if benchmark_sizes and not try_run:
+        passes_list.append(('benchmark',))
+
+    timings_fn = os.path.join(target_dir, 'timings.json')
+    timings = {}
+    if os.path.exists(timings_fn):
+        with open(timings_fn) as fd:
+            timings = json.load(fd)
+
+    targets = [item[1] for item in array_libraries[1:] if item[-1] is not None]
+    profiles = {}
+    if profile:
+        profiles['main process'] = cfv.profiling.enable()
+    with Pool(processes) as p:
+        # target functions are validated in a worker process so that
+        # array libraries are imported only in worker processes
+        valid = dict(zip(targets, p.starmap(valid_targets, [(cls, function_names) for cls in targets])))
+
+        tool = tool_version()
+        rows = []
+        tasks = []
+        cells = {}
+        groups = {}
+        for fname in function_names:
+            ref, ref32 = reference_functions(fname, max_precision=max_precision, fast_reference=fast_reference)
+            names = []
+            for cls in targets:
+                for dtype in dtype_list:
+                    for device in device_list:
+                        if (fname, dtype, device) not in valid[cls]:
+                            names.append(None)
+                            continue
+                        f = cls(fname, dtype, device)
+                        f_ref = ref32 if f._dtype == 'complex64' else ref
+                        name = f'{fname}_{ref.library_name}_{ref._dtype}_{ref._device}_versus_{f.library_name}_{f._dtype}_{f._device}'
+                        names.append(name)
+                        metadata = dict(function=fname,
+                                        reference=[ref.library_name, ref._dtype, ref._device, ref.get_version()],
+                                        target=[f.library_name, f._dtype, f._device, f.get_version()],
+                                        sizes=[size_re, size_im, size_re2, size_im2], nested=nested, tile_size=tile_size)
+                        if benchmark_sizes and not try_run:
+                            metadata['benchmark_sizes'] = list(benchmark_sizes)
+                        if daz:
+                            metadata['daz'] = True
+                        metadata['fingerprint'] = cell_fingerprint(**metadata, fast_reference=fast_reference,
+                                                                   max_precision=max_precision,
+                                                                   f_reference=f_ref.get_version(), tool=tool)
+                        if incremental and not try_run:
+                            fn = os.path.join(target_dir, 'data', f'{name}.npz')
+                            if os.path.exists(fn) and cfv.store.load_metadata(fn).get('fingerprint') == metadata['fingerprint']:
+                                print(f'{name}: unchanged')
+                                continue
+                        cells[name] = [len(passes_list), {}, metadata]
+                        groups.setdefault((fname, dtype), []).append((name, cls, device))
+            rows.append([fname, names])
+
+        # the targets of the same function and dtype share the
+        # reference values in one task per pass
+        for (fname, dtype), group in groups.items():
+            for passes in passes_list:
+                tasks.append((f'{fname}_{dtype}:{"+".join(passes)}', fname, dtype, group, passes,
+                              size_re, size_im, size_re2, size_im2,
+                              cache_dir, nested, fast_reference, max_precision, tile_size,
+                              benchmark_sizes, profile, daz))
+
+        # longest tasks first, tasks without timings are assumed to be
+        # the longest ones
+        tasks.sort(key=lambda task: timings.get(task[0], float('inf')), reverse=True)
+
+        task_functions = {task[0]: task[1] for task in tasks}
+        if tasks:
+            for key, images, task_profile, elapsed in p.imap_unordered(worker, tasks):
+                timings[key] = elapsed
+                if task_profile is not None:
+                    profiles.setdefault(task_functions[key], cfv.profiling.Profile()).merge(
+                        cfv.profiling.Profile.load(task_profile))
+                for name, cell_images in images.items():
+                    cell = cells[name]
+                    cell[0] -= 1
+                    if 'benchmark' in cell_images:
+                        cell[2]['benchmark'] = cell_images.pop('benchmark')
+                    cell[1].update(cell_images)
+                    if cell[0] > 0:
+                        continue
+                    del cells[name]
+                    if try_run:
+                        print(f'{name}.txt')
+                        print(cfv.ReportImage.load(*cell[1]['report']))
+                        continue
+                    fn = os.path.join(target_dir, 'data', f'{name}.npz')
+                    with cfv.profiling.phase('store'):
+                        cfv.store.save(fn, cell[1], **cell[2])
                     print(f'Created {fn}')
+                if not try_run:
+                    with open(timings_fn, 'w') as fd:
+                        json.dump(timings, fd, indent=1, sort_keys=True)
 
-    table = '\n'.join(rows)
+    if try_run:
+        if profile:
+            write_profile(target_dir, profiles)
+        return
 
     versions = '\n'.join([f'- {item[-1]}' for item in array_libraries if item[-1] is not None])
 
@@ -141,53 +348,161 @@ def main_results(array_libraries, target_dir='cfv_results', try_run=False):
     else:
         ref = cfv.NumpyFunction('exp', 'complex128')
 
+    if fast_reference:
+        fast_reference_note = ' (complex64 targets: DoubleDouble with MPMath fallback)'
+    else:
+        fast_reference_note = ''
+    if max_precision is not None and mpmath is not None:
+        fast_reference_note += f' (adaptive precision up to {max_precision} digits)'
+
+    index = dict(column_labels=column_labels, rows=rows, versions=versions,
+                 reference=f'{ref.library_name}, {ref._dtype}{fast_reference_note}')
+    with open(os.path.join(target_dir, 'results.json'), 'w') as fd:
+        json.dump(index, fd, indent=1)
+
+    render_results(target_dir)
+    if profile:
+        write_profile(target_dir, profiles)
+
+
+def write_profile(target_dir, profiles):
+    """Disable profiling and write profiles to profile.json in target_dir.
+
+    The profiles of the functions that were not run, say, in an
+    incremental run, are kept from the existing profile.json, the
+    profiles of the functions that were run replace the existing ones.
+    """
+    cfv.profiling.disable()
+    fn = os.path.join(target_dir, 'profile.json')
+    state = {}
+    if os.path.exists(fn):
+        with open(fn) as fd:
+            state = json.load(fd)
+    state.update({name: profile.dump() for name, profile in profiles.items()})
+    with open(fn, 'w') as fd:
+        json.dump(state, fd, indent=1, sort_keys=True)
+    print(f'Created {fn}')
+
+
+def render_results(target_dir):
+    """Render data/*.txt files and README.md from the result stores in
+    target_dir, see `main_results`.
+    """
+    with open(os.path.join(target_dir, 'results.json')) as fd:
+        index = json.load(fd)
+    column_labels = index['column_labels']
+
+    rows = [' | '.join([''] + column_labels + [''])]
+    rows += [' | '.join(['', ':----'] + [':----:'] * (len(column_labels)-1) + [''])]
+    for fname, names in index['rows']:
+        cols = [fname]
+        for name in names:
+            if name is None:
+                cols.append('N/A')
+                continue
+            images, metadata = cfv.store.load(os.path.join(target_dir, 'data', f'{name}.npz'))
+            fn = os.path.join(target_dir, 'data', f'{name}.txt')
+            with open(fn, 'w') as fd:
+                fd.write(str(images['report']))
+            print(f'Created {fn}')
+            cols.append(rating_cell(images['stats'].get_stats()[0], f'{name}.txt', benchmark=metadata.get('benchmark')))
+        rows.append(' | '.join([''] + cols + ['']))
+
+    table = '\n'.join(rows)
+
     content = f'''
 # Results
 
 This document is generated using [Complex Function Validation](https://github.com/pearu/complex_function_validation) tool.
 
 Array library versions:
-{versions}
+{index['versions']}
 
-Reference library and dtype: {ref.library_name}, {ref._dtype}
+Reference library and dtype: {index['reference']}
 
 ## Table of match/inaccurracy/mismatch rates
 
+The rates are followed by the maximal and 99th percentile ULP
+distances between function and reference values with finite or
+equal non-finite components. When benchmarked, the ULP distances are
+followed by the throughput in millions of samples per second and
+the median/99th percentile latency on the largest benchmark grid.
+
 {table}
 '''
 
-    if not try_run:
-        fn = os.path.join(target_dir, 'README.md')
-        fd = open(fn, 'w')
-        fd.write(content)
-        fd.close()
-        print(f'Created {fn}')
+    fn = os.path.join(target_dir, 'README.md')
+    fd = open(fn, 'w')
+    fd.write(content)
+    fd.close()
+    print(f'Created {fn}')
 
 if __name__ == '__main__':
+    import sys
+    if sys.argv[1:2] == ['render']:
+        # re-render results from stores:
+        #   python -m complex_function_validation.run render <target_dir>...
+        for target_dir in sys.argv[2:]:
+            render_results(target_dir)
+        sys.exit(0)
+
     #set_start_method('spawn')
     set_start_method('forkserver')
 
-    libs = dict(
-        mpmath=('MPMath', cfv.MPMathFunction, cfv.MPMathFunction.get_module_version()),
-        numpy=('NumPy', cfv.NumpyFunction, cfv.NumpyFunction.get_module_version()),
-        jax=('JAX', cfv.JaxNumpyFunction, cfv.JaxNumpyFunction.get_module_version()),
-        torch=('PyTorch', cfv.TorchFunction, cfv.TorchFunction.get_module_version()),
-        complex_math=('ComplexMath', cfv.ComplexMathFunction, cfv.ComplexMathFunction.get_module_version())
-    )
+    # array libraries are not imported here, see cfv.backends
+    libs = {name: cfv.backends.library(name) for name in cfv.backends.backend_names()}
 
     if mpmath is not None:
         reflib = 'mpmath'
     else:
         reflib = 'numpy'
-    
+
+    # Reference values are cached between runs, set CFV_CACHE_DIR to
+    # an empty string to disable caching.
+    cache_dir = os.environ.get('CFV_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'complex_function_validation')) or None
+    # Set CFV_FAST_REFERENCE=1 to compute the reference values of
+    # complex64 targets with DoubleDoubleFunction.
+    # Set CFV_MAX_PRECISION to the maximal number of decimal digits
+    # for escalating mpmath precision adaptively.
+    max_precision = int(os.environ.get('CFV_MAX_PRECISION', '0')) or None
+    # Set CFV_TILE_SIZE to evaluate the statistics grid in tiles so
+    # that large grids, say CFV_STATS_SIZE=5000, fit in memory.
+    tile_size = int(os.environ.get('CFV_TILE_SIZE', '0')) or None
+    stats_size = int(os.environ.get('CFV_STATS_SIZE', '0')) or None
+    # Result cells with unchanged fingerprints are reused, set
+    # CFV_FORCE=1 to regenerate all cells.
+    incremental = os.environ.get('CFV_FORCE', '0') == '0'
+    # Set CFV_PROCESSES to the number of worker processes, defaults
+    # to the number of CPUs.
+    processes = int(os.environ.get('CFV_PROCESSES', '0')) or None
+    # Set CFV_BENCHMARK to comma-separated grid sizes, or to 1 for
+    # default sizes, to measure the throughput of target functions.
+    benchmark_sizes = os.environ.get('CFV_BENCHMARK', '0')
+    if benchmark_sizes == '1':
+        benchmark_sizes = cfv.benchmark.default_sizes
+    elif benchmark_sizes != '0':
+        benchmark_sizes = tuple(map(int, benchmark_sizes.split(',')))
+    else:
+        benchmark_sizes = None
+    # Set CFV_PROFILE=1 to write the per-phase timings of tasks to
+    # profile.json in the target directory.
+    profile = os.environ.get('CFV_PROFILE', '0') != '0'
+    # Set CFV_DAZ=1 to model the DAZ (denormals-are-zero) behavior of
+    # JAX on CPU, that is, to compare against reference values on
+    # flushed inputs.
+    daz = os.environ.get('CFV_DAZ', '0') != '0'
+    options = dict(cache_dir=cache_dir, fast_reference=os.environ.get('CFV_FAST_REFERENCE', '0') != '0',
+                   max_precision=max_precision, tile_size=tile_size, stats_size=stats_size, incremental=incremental,
+                   processes=processes, benchmark_sizes=benchmark_sizes, profile=profile, daz=daz)
+
     import warnings
     with warnings.catch_warnings():
         warnings.simplefilter("ignore")
         if 0:
-            main_results([libs[reflib], libs['jax']], target_dir=f'{reflib}_jax_results')
-        if 0 and cfv.TorchFunction.get_module_version() is not None:
-            main_results([libs[reflib], libs['torch']], target_dir=f'{reflib}_torch_results')
-        if 0 and cfv.MPMathFunction.get_module_version() is not None:
-            main_results([libs[reflib], libs['numpy']], target_dir=f'{reflib}_numpy_results')
+            main_results([libs[reflib], libs['jax']], target_dir=f'{reflib}_jax_results', **options)
+        if 0 and libs['torch'][-1] is not None:
+            main_results([libs[reflib], libs['torch']], target_dir=f'{reflib}_torch_results', **options)
+        if 0 and libs['mpmath'][-1] is not None:
+            main_results([libs[reflib], libs['numpy']], target_dir=f'{reflib}_numpy_results', **options)
         if 0:
-            main_results([libs[reflib], libs['complex_math']], target_dir=f'{reflib}_complex_math_results')
+            main_results([libs[reflib], libs['complex_math']], target_dir=f'{reflib}_complex_math_results', **options)
@@ -0,0 +1,54 @@
+"""Binary store of comparison results.
+
+A store is a compressed .npz file that contains the dumps of
+ReportImage instances, see `ReportImage.dump`, and metadata.
+"""
+
+import os
+import json
+
+import numpy
+
+
+def save(path, images, **metadata):
+    """Save images and metadata to path.
+
+    Parameters
+    ----------
+    path: the path of .npz file
+    images: a dictionary of names and ReportImage dumps
+    metadata: JSON serializable metadata
+    """
+    state = dict(metadata=metadata, images={})
+    arrays = {}
+    for name, (image_state, image_arrays) in images.items():
+        state['images'][name] = image_state
+        for key, array in image_arrays.items():
+            arrays[f'{name}.{key}'] = array
+    arrays['state'] = numpy.frombuffer(json.dumps(state).encode(), dtype=numpy.uint8)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as fd:
+        numpy.savez_compressed(fd, **arrays)
+    os.replace(tmp, path)
+
+
+def load(path):
+    """Return a dictionary of names and ReportImage instances and
+    metadata from the store at path.
+    """
+    from . import ReportImage
+    with numpy.load(path) as data:
+        state = json.loads(data['state'].tobytes())
+        images = {}
+        for name, image_state in state['images'].items():
+            prefix = f'{name}.'
+            arrays = {key[len(prefix):]: data[key] for key in data.files if key.startswith(prefix)}
+            images[name] = ReportImage.load(image_state, arrays)
+    return images, state['metadata']
+
+
+def load_metadata(path):
+    """Return the metadata of the store at path.
+    """
+    with numpy.load(path) as data:
+        return json.loads(data['state'].tobytes())['metadata']
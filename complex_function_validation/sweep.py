@@ -0,0 +1,277 @@
+"""Exhaustive sweeps and bisection searches of function inputs on
+axes and rays.
+
+For instance, the following compares numpy.sqrt on all float32 inputs
+of the real axis against the numpy.sqrt on float64 inputs:
+
+  >>> import complex_function_validation as cfv
+  >>> from complex_function_validation.sweep import sweep_axis
+  >>> stats = sweep_axis(cfv.NumpyFunction('sqrt', 'complex128'),
+  ...                    cfv.NumpyFunction('sqrt', 'complex64'), axis='real')
+  >>> print(stats.summary())
+
+and the following finds the exact float32 inputs between 1e-8 and
+1e-6 where numpy.log1p values stop matching the reference values:
+
+  >>> from complex_function_validation.sweep import find_transitions
+  >>> transitions, evaluations = find_transitions(
+  ...     cfv.MPMathFunction('log1p', 'complex128'),
+  ...     cfv.NumpyFunction('log1p', 'complex64'), 1e-8, 1e-6)
+"""
+
+from itertools import repeat
+
+import numpy
+
+_uint_dtypes = {4: numpy.uint32, 8: numpy.uint64}
+
+
+def samples_from_bits(dtype, bits, axis='real'):
+    """Return an array of samples with the given real dtype whose bit
+    patterns are bits.
+
+    When axis is 'imag', return complex samples with zero real part.
+    When axis is a number, return complex samples t * exp(1j * axis)
+    on the ray with angle axis where t are the real samples.
+    """
+    dtype = numpy.dtype(dtype)
+    points = numpy.asarray(bits).astype(_uint_dtypes[dtype.itemsize]).view(dtype)
+    if axis == 'real':
+        return points
+    if axis == 'imag':
+        samples = numpy.zeros(points.shape, dtype=numpy.result_type(dtype, numpy.complex64))
+        samples.imag[:] = points
+        return samples
+    if isinstance(axis, (int, float)):
+        samples = numpy.empty(points.shape, dtype=numpy.result_type(dtype, numpy.complex64))
+        with numpy.errstate(all='ignore'):
+            samples.real[:] = points * numpy.cos(axis)
+            samples.imag[:] = points * numpy.sin(axis)
+        return samples
+    raise ValueError(f'axis must be "real", "imag", or an angle, got {axis!r}')
+
+
+def axis_samples(dtype, start, stop, axis='real'):
+    """Return an array of axis samples with the given real dtype whose
+    bit patterns are start, start + 1, ..., stop - 1.
+
+    When axis is 'imag', return complex samples with zero real part.
+    """
+    return samples_from_bits(dtype, numpy.arange(start, stop, dtype=numpy.uint64), axis=axis)
+
+
+def compare_samples(ref, function, samples):
+    """Return reference values, function values, and comparison codes
+    of reference and function on samples.
+
+    Reference values are computed on flushed samples when the
+    function device treats subnormal inputs as zeros, and reference
+    values are flushed when the device flushes subnormal outputs to
+    zero.
+    """
+    from . import compare_arrays, ftz_array
+    numpy_dtype = samples.dtype
+    if function.apply_daz(function._device):
+        reference = ref.evaluate(ftz_array(samples.copy()), numpy_dtype)
+    else:
+        reference = ref.evaluate(samples, numpy_dtype)
+    if function.apply_ftz(function._device):
+        reference = ftz_array(reference.copy())
+    values = function.evaluate(samples, numpy_dtype)
+    return reference, values, compare_arrays(reference, values)
+
+
+class SweepStats:
+    """Aggregate statistics of an axis sweep.
+
+    Keeps the counts of comparison codes, see `compare_legend`, and
+    the worst offenders, that is, the samples with the most severe
+    codes and the largest relative differences.
+    """
+
+    def __init__(self, worst=10):
+        self.counts = numpy.zeros(256, dtype=numpy.int64)
+        self.worst = worst
+        self.offenders = []
+
+    def __repr__(self):
+        return f'{type(self).__name__}(worst={self.worst})'
+
+    def update(self, inputs, reference, values, codes):
+        """Update statistics with the comparison codes of reference
+        values and values on inputs.
+        """
+        from . import _code_ranks
+        self.counts += numpy.bincount(codes, minlength=256)
+        ranks = _code_ranks[codes]
+        candidates = numpy.flatnonzero(ranks > _code_ranks[ord('~')])
+        if not candidates.size:
+            return
+        r, v = reference[candidates], values[candidates]
+        with numpy.errstate(all='ignore'):
+            reldiff = abs(r - v) / numpy.maximum(abs(r), abs(v))
+        reldiff[~numpy.isfinite(reldiff)] = numpy.inf
+        order = numpy.lexsort((reldiff, ranks[candidates]))[::-1][:self.worst]
+        self.offenders.extend((int(ranks[candidates[i]]), float(reldiff[i]), inputs[candidates[i]], v[i], r[i])
+                              for i in order)
+        self._select()
+
+    def merge(self, other):
+        """Merge statistics of other sweep into self.
+        """
+        self.counts += other.counts
+        self.offenders.extend(other.offenders)
+        self._select()
+        return self
+
+    def _select(self):
+        self.offenders.sort(key=lambda item: item[:2], reverse=True)
+        del self.offenders[self.worst:]
+
+    @property
+    def stats(self):
+        """Return code counts as a dictionary like the items of
+        `ReportImage.stats`.
+        """
+        from collections import defaultdict
+        stats = defaultdict(int)
+        for c in numpy.flatnonzero(self.counts):
+            stats[chr(c)] = int(self.counts[c])
+        return stats
+
+    def summary(self):
+        from . import ReportImage, _ranked_codes
+        lines = [f'samples: {self.counts.sum()}', ReportImage.stats_summary(self.stats)]
+        if self.offenders:
+            lines.append('Worst offenders:')
+            for rank, reldiff, input, value, reference in self.offenders:
+                lines.append(f'  {chr(_ranked_codes[rank])}: {input!r} -> {value!r} {reference!r}')
+        return '\n'.join(lines)
+
+
+def sweep_chunk(ref, function, start, stop, axis='real', worst=10):
+    """Return SweepStats of comparing function against reference
+    function on axis samples with bit patterns in range(start, stop).
+    """
+    samples = axis_samples(function.numpy_real_dtype, start, stop, axis=axis)
+    stats = SweepStats(worst=worst)
+    stats.update(samples, *compare_samples(ref, function, samples))
+    return stats
+
+
+def sweep_axis(ref, function, axis='real', start=0, stop=None, chunk_size=2 ** 22, executor=None, worst=10):
+    """Compare function against reference function on all axis samples
+    with bit patterns in range(start, stop).
+
+    Parameters
+    ----------
+    ref, function: Function instances
+    axis: 'real' for real inputs, 'imag' for complex inputs with zero
+      real part
+    start, stop: the range of bit patterns, by default, all bit
+      patterns of the function real dtype are swept
+    chunk_size: the number of samples evaluated at once
+    executor: concurrent.futures executor used for evaluating chunks
+      in parallel
+    worst: the number of worst offenders to keep
+
+    Memory usage is bounded by chunk_size regardless of the sweep size.
+    """
+    if stop is None:
+        stop = 1 << (8 * numpy.dtype(function.numpy_real_dtype).itemsize)
+    starts = range(start, stop, chunk_size)
+    stops = (min(s + chunk_size, stop) for s in starts)
+    args = (repeat(ref), repeat(function), starts, stops, repeat(axis), repeat(worst))
+    stats = SweepStats(worst=worst)
+    results = map(sweep_chunk, *args) if executor is None else executor.map(sweep_chunk, *args)
+    for chunk_stats in results:
+        stats.merge(chunk_stats)
+    return stats
+
+
+def find_transitions(ref, function, start, stop, axis='real', predicate='=c~', grid_size=64):
+    """Find the inputs between start and stop where the predicate of
+    comparison codes of reference and function values changes.
+
+    The interval is sampled with grid_size samples that are evenly
+    spaced in the bit patterns of the function real dtype, that is,
+    approximately evenly spaced in log scale. Each grid interval with
+    different predicate values at its ends is bisected over bit
+    patterns until its ends are adjacent floats, so that a transition
+    costs O(log(stop - start)) evaluations. Transitions between grid
+    points that cancel out, say, a short region of mismatches, are
+    not found.
+
+    Parameters
+    ----------
+    ref, function: Function instances
+    start, stop: the interval ends, must have the same sign, a zero
+      end takes the sign of the other end
+    axis: 'real' for real inputs, 'imag' for complex inputs with zero
+      real part, or the angle of a ray of complex inputs, see
+      `samples_from_bits`
+    predicate: a string of codes or a function of a codes array that
+      returns a boolean array
+    grid_size: the number of initial grid points
+
+    Returns
+    -------
+    transitions: a list of (before, after, code_before, code_after)
+      where before and after are adjacent inputs with different
+      predicate values ordered from start to stop
+    evaluations: the number of evaluated samples
+    """
+    dtype = numpy.dtype(function.numpy_real_dtype)
+    if isinstance(predicate, str):
+        predicate_codes = numpy.frombuffer(predicate.encode(), dtype=numpy.uint8)
+
+        def predicate(codes):
+            return numpy.isin(codes, predicate_codes)
+
+    if numpy.signbit(start) != numpy.signbit(stop) and start != 0 and stop != 0:
+        raise ValueError(f'interval ends must have the same sign, got {start} and {stop}')
+    # a zero end gets the sign of the other end so that the bit
+    # patterns between the ends are the floats of the interval
+    if start == 0:
+        start = numpy.copysign(0.0, stop)
+    if stop == 0:
+        stop = numpy.copysign(0.0, start)
+    lo, hi = numpy.array([start, stop], dtype=dtype).view(_uint_dtypes[dtype.itemsize]).astype(numpy.uint64)
+    reverse = lo > hi
+    if reverse:
+        lo, hi = hi, lo
+
+    evaluations = 0
+
+    def evaluate(bits):
+        nonlocal evaluations
+        evaluations += bits.size
+        samples = samples_from_bits(dtype, bits, axis=axis)
+        return compare_samples(ref, function, samples)[2]
+
+    grid = numpy.linspace(float(lo), float(hi), grid_size).astype(numpy.uint64)
+    grid = numpy.unique(numpy.concatenate(([lo], grid.clip(lo, hi), [hi])))
+    codes = evaluate(grid)
+    flags = predicate(codes)
+    index = numpy.flatnonzero(flags[1:] != flags[:-1])
+    lo_bits, hi_bits = grid[index], grid[index + 1]
+    lo_codes, hi_codes = codes[index], codes[index + 1]
+    lo_flags = flags[index]
+    while True:
+        active = numpy.flatnonzero(hi_bits - lo_bits > 1)
+        if not active.size:
+            break
+        mid = lo_bits[active] + (hi_bits[active] - lo_bits[active]) // 2
+        mid_codes = evaluate(mid)
+        as_lo = predicate(mid_codes) == lo_flags[active]
+        lo_bits[active[as_lo]] = mid[as_lo]
+        lo_codes[active[as_lo]] = mid_codes[as_lo]
+        hi_bits[active[~as_lo]] = mid[~as_lo]
+        hi_codes[active[~as_lo]] = mid_codes[~as_lo]
+
+    before = samples_from_bits(dtype, lo_bits, axis=axis)
+    after = samples_from_bits(dtype, hi_bits, axis=axis)
+    transitions = [(b, a, chr(cb), chr(ca)) for b, a, cb, ca in zip(before, after, lo_codes, hi_codes)]
+    if reverse:
+        transitions = [(a, b, ca, cb) for b, a, cb, ca in reversed(transitions)]
+    return transitions, evaluations
@@ -73,3 +73,595 @@ def test_real_axis():
                     
                     ][size]
         assert s == expected
+
+
+def test_compare_arrays():
+    for dtype in [numpy.complex64, numpy.complex128, numpy.float32, numpy.float64]:
+        complex_dtype = {numpy.float32: numpy.complex64, numpy.float64: numpy.complex128}.get(dtype, dtype)
+        samples = cfv.ComplexPlaneSampler(complex_dtype)(5, 5)
+        reference = (samples if dtype is complex_dtype else samples.real).ravel()
+        values = reference.copy()
+        with numpy.errstate(all='ignore'):
+            values[1::4] *= dtype(1 + 1e-5)
+            values[2::8] = numpy.nan
+            values[3::8] = numpy.inf
+            values[6::8] *= 2
+        codes = cfv.compare_arrays(reference, values)
+        assert codes.dtype == numpy.uint8
+        expected = [cfv.compare(r, v) for r, v in zip(reference, values)]
+        assert codes.view('S1').astype(str).tolist() == expected
+
+
+def test_ftz_array():
+    for dtype in [numpy.float16, numpy.float32, numpy.float64, numpy.longdouble,
+                  numpy.complex64, numpy.complex128, numpy.clongdouble]:
+        finfo = numpy.finfo(dtype)
+        parts = numpy.array([0, -0.0, 1, -1, finfo.tiny, -finfo.tiny, finfo.tiny / 2, -finfo.tiny / 4,
+                             finfo.smallest_subnormal, numpy.inf, -numpy.inf, numpy.nan], dtype=finfo.dtype)
+        expected = numpy.where((parts != 0) & (abs(parts) < finfo.tiny), parts * 0, parts)
+        if numpy.dtype(dtype).kind == 'c':
+            values = numpy.empty((parts.size, parts.size), dtype=dtype)
+            values.real, values.imag = parts[:, None], parts[None, :]
+            expected_parts, expected = expected, numpy.empty_like(values)
+            expected.real, expected.imag = expected_parts[:, None], expected_parts[None, :]
+        else:
+            values = numpy.stack([parts, parts[::-1]])
+            expected = numpy.stack([expected, expected[::-1]])
+        # non-contiguous view
+        values, expected = values[::-1, ::2], expected[::-1, ::2]
+        assert cfv.ftz_array(values) is values
+        for a, b in zip(cfv._components(values), cfv._components(expected)):
+            assert numpy.array_equal(a, b, equal_nan=True)
+            assert numpy.array_equal(numpy.signbit(a), numpy.signbit(b))
+        assert cfv.ftz(dtype(finfo.tiny / 2)) == 0
+    # DAZ modeling is opt-in
+    assert not cfv.JaxNumpyFunction('exp', 'complex64', 'cpu').apply_daz('cpu')
+    assert cfv.JaxNumpyFunction('exp', 'complex64', 'cpu', daz=True).apply_daz('cpu')
+    assert not cfv.JaxNumpyFunction('exp', 'complex64', 'cuda', daz=True).apply_daz('cuda')
+    assert not cfv.NumpyFunction('exp', 'complex64', 'cpu', daz=True).apply_daz('cpu')
+
+
+def test_reference_cache(tmp_path):
+    samples = cfv.ComplexPlaneSampler(numpy.complex64)(3, 3)
+    cache = cfv.ReferenceCache(str(tmp_path))
+    ref = cfv.MPMathFunction('log1p', 'complex128', cache=cache)
+    values = ref.evaluate(samples, numpy.complex64)
+    assert (cache.hits, cache.misses) == (0, 1)
+    cached_values = ref.evaluate(samples, numpy.complex64)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert isinstance(cached_values, numpy.memmap)
+    assert numpy.array_equal(values, cached_values, equal_nan=True)
+
+    ref.evaluate(samples.real, numpy.float32)
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert len(list(tmp_path.glob('*.npy'))) == 2
+
+    cache.max_bytes = 0
+    ref.evaluate(samples[:3], numpy.complex64)
+    assert cache.evictions == 2
+    assert len(list(tmp_path.glob('*.npy'))) == 1
+
+
+def test_evaluation_memo():
+    ref = cfv.NumpyFunction('sqrt', 'complex128')
+    memo = cfv.EvaluationMemo()
+    for i in range(2):
+        image = cfv.ReportImage()
+        image.generate_report(ref, [cfv.NumpyFunction('sqrt', 'complex64')], size_re=5, memo=memo)
+    # complex plane and real line values are evaluated once
+    assert (memo.hits, memo.misses, len(memo)) == (4, 4, 4)
+    samples = cfv.ComplexPlaneSampler(numpy.complex64)(5, 5)
+    values = ref.evaluate(samples, numpy.complex64, memo=memo)
+    assert memo.hits == 5
+    assert not values.flags.writeable
+    assert numpy.array_equal(values, ref.evaluate(samples, numpy.complex64), equal_nan=True)
+
+    memo = cfv.EvaluationMemo(max_bytes=values.nbytes + samples.nbytes)
+    ref.evaluate(samples, numpy.complex64, memo=memo)
+    ref.evaluate(samples[1:], numpy.complex64, memo=memo)
+    assert len(memo) == 1 and memo.nbytes <= memo.max_bytes
+
+
+def test_nested_sampler():
+    for dtype in [numpy.complex64, numpy.complex128]:
+        sampler = cfv.ComplexPlaneSampler(dtype, nested=True)
+        for size, fine_size in [(0, 3), (1, 4), (2, 9), (21, 41), (41, 201)]:
+            indices = sampler.subgrid_indices(size, fine_size)
+            assert numpy.array_equal(sampler.axis(size), sampler.axis(fine_size)[indices])
+        index = numpy.ix_(sampler.subgrid_indices(5, 9), sampler.subgrid_indices(3, 9))
+        assert numpy.array_equal(sampler(3, 5), sampler(9, 9)[index])
+
+    ref = cfv.NumpyFunction('log1p', 'complex128')
+    f = cfv.NumpyFunction('log1p', 'complex64')
+    memo = cfv.EvaluationMemo()
+    image = cfv.ReportImage()
+    image.generate_report(ref, [f], size_re=9, memo=memo, nested=True)
+    assert (memo.misses, memo.subgrid_hits) == (4, 0)
+    image = cfv.ReportImage()
+    image.generate_report(ref, [f], size_re=5, memo=memo, nested=True)
+    assert (memo.misses, memo.subgrid_hits) == (4, 4)
+    expected = cfv.ReportImage()
+    expected.generate_report(ref, [f], size_re=5, nested=True)
+    assert str(image) == str(expected)
+
+
+def test_mpmath_chunks():
+    from concurrent.futures import ProcessPoolExecutor
+    samples = cfv.ComplexPlaneSampler(numpy.complex64)(4, 3)
+    expected = cfv.MPMathFunction('arccos', 'complex128').evaluate(samples, numpy.complex64)
+    with ProcessPoolExecutor(2) as executor:
+        for chunks in [1, 3, 7, samples.size + 1]:
+            ref = cfv.MPMathFunction('arccos', 'complex128', executor=executor, chunks=chunks)
+            values = ref.evaluate(samples, numpy.complex64)
+            assert numpy.array_equal(values, expected, equal_nan=True)
+        values = ref.evaluate(samples.real[4:5], numpy.float32)
+        expected = cfv.MPMathFunction('arccos', 'complex128').evaluate(samples.real[4:5], numpy.float32)
+        assert numpy.array_equal(values, expected, equal_nan=True)
+
+
+def test_mpmath_special_cases():
+    inf, nan = numpy.inf, numpy.nan
+    samples = numpy.array([complex(inf, 1), complex(-inf, 3), complex(inf, -inf), complex(nan, 2), complex(0, 1)])
+    ref = cfv.MPMathFunction('exp', 'complex128')
+    with ref.context:
+        values = ref(samples)
+    assert numpy.array_equal(values[:2], [complex(inf, inf), complex(-0.0, 0.0)])
+    assert numpy.isnan(values[2:4]).all()
+    assert numpy.isclose(values[4], numpy.exp(1j))
+    assert not numpy.signbit(values[1].real)
+
+    ref = cfv.MPMathFunction('sqrt', 'complex128')
+    with ref.context:
+        values = ref(numpy.array([-1.0, -inf, inf, nan, 4.0]))
+    assert values.dtype == numpy.float64
+    assert numpy.array_equal(values, [nan, nan, inf, nan, 2.0], equal_nan=True)
+
+    plan = cfv._special_cases_plan('sqrt', False, ref.precision)
+    assert ('+x', '-x') not in plan
+    assert plan is cfv._special_cases_plan('sqrt', False, ref.precision)
+
+
+def test_double_double():
+    from complex_function_validation.run import function_names
+
+    samples = cfv.ComplexPlaneSampler(numpy.complex64)(10, 10)
+    for fname in function_names:
+        # mpmath with default precision is inaccurate for samples
+        # with tiny or huge components
+        ref = cfv.MPMathFunction(fname, 'complex128', max_precision=1000)
+        f = cfv.DoubleDoubleFunction(fname, 'complex128', fallback=ref)
+        for s, dtype in [(samples, numpy.complex64), (samples.real[11], numpy.float32)]:
+            expected = ref.evaluate(s, dtype)
+            values = f.evaluate(s, dtype)
+            assert values.dtype == dtype
+            assert numpy.array_equal(values, expected, equal_nan=True), fname
+    # supported samples are evaluated without fallback
+    f = cfv.DoubleDoubleFunction('exp', 'complex128')
+    z = samples.astype(numpy.complex128)
+    values, certain = f.module.round_float32(*f(z))
+    assert certain[f.module.is_supported(z)].all()
+
+
+def test_mpmath_adaptive():
+
+    class MPMathFunction(cfv.MPMathFunction):
+        precision = 1000
+
+    samples = cfv.ComplexPlaneSampler(numpy.complex128)(5, 5)
+    expected = MPMathFunction('arctan', 'complex128').evaluate(samples, numpy.complex128)
+    ref = cfv.MPMathFunction('arctan', 'complex128')
+    assert not numpy.array_equal(ref.evaluate(samples, numpy.complex128), expected, equal_nan=True)
+    ref = cfv.MPMathFunction('arctan', 'complex128', max_precision=1000)
+    values = ref.evaluate(samples, numpy.complex128)
+    assert numpy.array_equal(values, expected, equal_nan=True)
+    assert ref.escalations[20] == samples.size
+    assert 0 < ref.escalations[640] < ref.escalations[40] <= samples.size
+
+    # most samples stop at the first precision level
+    expected = MPMathFunction('log1p', 'complex128').evaluate(samples, numpy.complex128)
+    ref = cfv.MPMathFunction('log1p', 'complex128', max_precision=1000)
+    values = ref.evaluate(samples, numpy.complex128)
+    assert numpy.array_equal(values, expected, equal_nan=True)
+    assert ref.escalations[20] == samples.size
+    assert ref.escalations[40] < samples.size // 2
+
+
+def test_tiled_report():
+    sampler = cfv.ComplexPlaneSampler(numpy.complex64)
+    samples = sampler(6, 4)
+    tiled = numpy.zeros_like(samples)
+    for rows, cols, tile in sampler.tiles(6, 4, 5):
+        assert tile.size <= 25
+        tiled[rows, cols] = tile
+    assert numpy.array_equal(tiled, samples)
+
+    ref = cfv.NumpyFunction('log1p', 'complex128')
+    f = cfv.NumpyFunction('log1p', 'complex64')
+    expected = cfv.ReportImage()
+    expected.generate_report(ref, [f], size_re=6)
+    image = cfv.ReportImage()
+    image.generate_report(ref, [f], size_re=6, tile_size=4)
+    assert str(image) == str(expected)
+
+    image = cfv.ReportImage()
+    image.generate_report(ref, [f], size_re=20, tile_size=8, map_size=6)
+    expected = cfv.ReportImage()
+    expected.generate_report(ref, [f], size_re=20)
+    assert image.get_stats() == expected.get_stats()
+    codes = image.image[image.image_slices[-1]]
+    expected_codes = expected.image[expected.image_slices[-1]]
+    assert codes.shape == (15, 15)
+    # map cells show the most severe codes
+    assert set(codes.ravel()) <= set(expected_codes.ravel())
+    assert (codes == b'X').any() and (codes == b'I').any()
+
+    # map blocks and axis labels are symmetric with respect to zero
+    for size, map_size in [(20, 6), (7, 3), (5, 5)]:
+        map_indices = cfv.downsample_indices(size, map_size)
+        assert numpy.array_equal(map_indices, 2 * map_size + 2 - map_indices[::-1])
+        label_indices = cfv.downsample_labels(map_indices)
+        assert label_indices.size == 2 * map_size + 3
+        assert numpy.array_equal(label_indices, 2 * size + 2 - label_indices[::-1])
+        labels = sampler.axis(size)[label_indices]
+        assert numpy.allclose(labels, -labels[::-1], rtol=1e-4)
+
+
+def test_sweep_axis():
+    from concurrent.futures import ProcessPoolExecutor
+    from complex_function_validation.sweep import axis_samples, sweep_axis
+    start, stop = 0x3f7ffff0, 0x3f80000f
+    samples = axis_samples(numpy.float32, start, stop)
+    assert samples[15] < samples[16] == 1 < samples[17]
+    assert numpy.array_equal(axis_samples(numpy.float32, start, stop, axis='imag').imag, samples)
+    assert axis_samples(numpy.float32, 2 ** 32 - 1, 2 ** 32).view(numpy.uint32)[0] == 2 ** 32 - 1
+
+    ref = cfv.NumpyFunction('sinc', 'complex128')
+    f = cfv.NumpyFunction('sinc', 'complex64')
+    for axis in ['real', 'imag']:
+        samples = axis_samples(numpy.float32, start, stop, axis=axis)
+        codes = cfv.compare_arrays(ref.evaluate(samples, samples.dtype), f.evaluate(samples, samples.dtype))
+        expected = numpy.bincount(codes, minlength=256)
+        stats = sweep_axis(ref, f, axis=axis, start=start, stop=stop, chunk_size=7, worst=3)
+        assert numpy.array_equal(stats.counts, expected)
+        matches = numpy.isin(codes, numpy.frombuffer(b'=c~', dtype=numpy.uint8))
+        assert len(stats.offenders) == min(3, (~matches).sum()) > 0
+        assert stats.offenders == sorted(stats.offenders, key=lambda o: o[:2], reverse=True)
+        with ProcessPoolExecutor(2) as executor:
+            parallel_stats = sweep_axis(ref, f, axis=axis, start=start, stop=stop, chunk_size=7, executor=executor, worst=3)
+        assert numpy.array_equal(parallel_stats.counts, expected)
+        assert [o[:2] for o in parallel_stats.offenders] == [o[:2] for o in stats.offenders]
+
+
+def test_ulp_distance():
+    for dtype in [numpy.float32, numpy.float64]:
+        fi = numpy.finfo(dtype)
+        x = numpy.array([1, 0, -fi.smallest_subnormal, fi.max, -1, numpy.inf, numpy.nan, numpy.nan, 1], dtype=dtype)
+        y = numpy.array([1 + fi.eps, -0.0, fi.smallest_subnormal, numpy.inf, -1, numpy.inf,
+                         numpy.nan, 0, 1 - 3 * fi.epsneg], dtype=dtype)
+        assert cfv.ulp_distance(x, y).tolist() == [1, 0, 2, cfv.ulp_invalid, 0, 0, 0, cfv.ulp_invalid, 3]
+        assert cfv.ulp_distance(-y, -x).tolist() == cfv.ulp_distance(x, y).tolist()
+
+    values = numpy.array([1, 2, 3, 4], dtype=numpy.complex64)
+    reference = values.copy()
+    reference.imag[1] = numpy.nextafter(reference.imag[1], numpy.float32(1))
+    reference.real[2] = numpy.nextafter(numpy.nextafter(reference.real[2], numpy.float32(0)), numpy.float32(0))
+    reference[3] = numpy.inf
+    stats = cfv.UlpStats().update(reference, values).as_dict()
+    assert stats == dict(ulp_max=2, ulp_mean=1.0, ulp_p50=1, ulp_p90=2, ulp_p99=2, ulp_invalid=1, ulp_histogram=[1, 1, 1])
+
+    ref = cfv.NumpyFunction('log1p', 'complex128')
+    f = cfv.NumpyFunction('log1p', 'complex64')
+    image = cfv.ReportImage()
+    image.generate_report(ref, [f], size_re=6)
+    stats = image.get_stats()[0]
+    assert sum(stats['ulp_histogram']) + stats['ulp_invalid'] == stats['total']
+    assert stats['ulp_p50'] <= stats['ulp_p90'] <= stats['ulp_p99'] <= stats['ulp_max']
+
+
+def test_connected_components():
+    mask = numpy.array([[1, 0, 1, 1, 0, 0],
+                        [1, 0, 0, 0, 0, 1],
+                        [0, 1, 0, 0, 0, 0],
+                        [0, 0, 0, 1, 1, 1],
+                        [1, 0, 0, 0, 0, 1]], dtype=bool)
+    labels = cfv.connected_components(mask)
+    assert len(set(labels[mask])) == 5
+    assert labels[0, 0] == labels[1, 0] == labels[2, 1]
+    assert labels[3, 3] == labels[4, 5] != labels[1, 5]
+    assert cfv.component_center_points(labels) == [(1, 0), (0, 2), (1, 5), (3, 4), (4, 0)]
+
+    # a point connecting two components merges the components but
+    # is left unlabeled
+    mask = numpy.array([[1, 0, 1],
+                        [0, 1, 0],
+                        [0, 1, 0]], dtype=bool)
+    labels = cfv.connected_components(mask)
+    assert labels[0, 0] == labels[0, 2] and labels[1, 1] == 0
+    assert labels[2, 1] not in (0, labels[0, 0])
+    assert cfv.component_center_points(labels) == [(0, 0), (2, 1)]
+
+
+def test_report_image_growth():
+    image = cfv.ReportImage()
+    canvases = set()
+    for i in range(1000):
+        image.insert_text(-1, 0, f'{i}:' + 'x' * (i % 37))
+        canvases.add(id(image._canvas))
+    assert image.image.shape == (1000, max(len(f'{i}:') + i % 37 for i in range(1000)))
+    # the canvas is reallocated a logarithmic number of times
+    assert len(canvases) < 20
+    lines = str(image).splitlines()
+    assert lines[0] == '0:' and lines[-1] == '999:' + 'x' * (999 % 37)
+
+    image.insert_text(2, 40, 'right', align='right')
+    assert str(image).splitlines()[2] == '2:xx' + ' ' * 31 + 'right'
+
+
+def test_store(tmp_path):
+    ref = cfv.NumpyFunction('log1p', 'complex128')
+    f = cfv.NumpyFunction('log1p', 'complex64')
+    report = cfv.ReportImage()
+    report.generate_report(ref, [f], size_re=6)
+    report.insert_legend(-1, 10)
+    report.insert_samples(-1, 0, 'xXIN23456789ABCDEFM')
+    stats = cfv.ReportImage()
+    stats.generate_report(ref, [f], size_re=20, tile_size=8, map_size=6)
+
+    path = str(tmp_path / 'log1p.npz')
+    cfv.store.save(path, dict(report=report.dump(), stats=stats.dump(values=False)), function='log1p')
+    images, metadata = cfv.store.load(path)
+    assert metadata == dict(function='log1p')
+    assert str(images['report']) == str(report)
+    assert str(images['stats']) == str(stats)
+    assert images['report'].get_stats() == report.get_stats()
+    assert images['stats'].get_stats() == stats.get_stats()
+    assert images['stats'].reference_and_values == [None]
+    image = images['report']
+    assert image.get_samples('X') == report.get_samples('X')
+    image.insert_text(-1, 0, 'more')
+    assert str(image) == str(report) + '\nmore'
+
+
+def test_incremental_fingerprint(tmp_path):
+    from complex_function_validation import run
+    params = dict(function='exp', reference=['MPMath', 'complex128', 'cpu', 'mpmath 1.3.0'],
+                  target=['NumPy', 'complex64', 'cpu', 'numpy 2.0.0'], sizes=[40, 40, 200, 200], tool=run.tool_version())
+    fingerprint = run.cell_fingerprint(**params)
+    assert run.cell_fingerprint(**dict(reversed(params.items()))) == fingerprint
+    assert run.cell_fingerprint(**dict(params, target=['NumPy', 'complex64', 'cpu', 'numpy 2.1.0'])) != fingerprint
+
+    path = str(tmp_path / 'exp.npz')
+    cfv.store.save(path, dict(report=cfv.ReportImage().dump()), fingerprint=fingerprint)
+    assert cfv.store.load_metadata(path) == dict(fingerprint=fingerprint)
+
+
+def test_run_worker():
+    from complex_function_validation import run
+    task = ('sqrt_task', 'sqrt', 'complex64', [('sqrt_cell', cfv.NumpyFunction, 'cpu')], ('stats', 'report'),
+            4, 4, 13, 13, None, True, False, None, None, None, False, False)
+    key, images, profile, elapsed = run.worker(task)
+    assert (key, sorted(images['sqrt_cell']), profile) == ('sqrt_task', ['report', 'stats'], None)
+    assert elapsed > 0
+    stats = cfv.ReportImage.load(*images['sqrt_cell']['stats']).get_stats()[0]
+    assert stats['total'] == 29 * 29
+    report = cfv.ReportImage.load(*images['sqrt_cell']['report'])
+    assert 'Legend:' in str(report)
+
+    # the reference grids are evaluated once for all targets of a task
+    targets = [('numpy_cell', cfv.NumpyFunction, 'cpu'), ('complex_math_cell', cfv.ComplexMathFunction, 'cpu')]
+    for passes in [('stats', 'report'), ('stats',)]:
+        task = ('sin_task', 'sin', 'complex128', targets, passes,
+                4, 4, 13, 13, None, True, False, None, None, None, True, False)
+        key, images, profile, elapsed = run.worker(task)
+        assert sorted(images) == ['complex_math_cell', 'numpy_cell']
+        counters = profile['counters']
+        reference_library = run.reference_functions('sin')[0].library_name
+        assert counters[f'{reference_library} samples'] == counters['NumPy samples'] == counters['ComplexMath samples']
+
+
+def test_jax_jit_cache():
+    import pytest
+    pytest.importorskip('jax')
+    samples = cfv.ComplexPlaneSampler(numpy.complex64)(3, 3)
+    expected = cfv.JaxNumpyFunction('log1p', 'complex64', jit=False).evaluate(samples, numpy.complex64)
+    f = cfv.JaxNumpyFunction('log1p', 'complex64')
+    for i in range(3):
+        values = f.evaluate(samples, numpy.complex64)
+        assert numpy.array_equal(values, expected, equal_nan=True)
+    f.evaluate(samples.real, numpy.float32)
+    assert (f.jit_hits, f.jit_misses) == (2, 2)
+    # compiled functions are shared between instances
+    g = cfv.JaxNumpyFunction('log1p', 'complex64')
+    g.evaluate(samples, numpy.complex64)
+    assert (g.jit_hits, g.jit_misses) == (1, 0)
+
+    # benchmarks report the throughput with and without the jit cache
+    from complex_function_validation import run
+    task = ('log1p_task', 'log1p', 'complex64', [('log1p_cell', cfv.JaxNumpyFunction, 'cpu')], ('benchmark',),
+            4, 4, 13, 13, None, True, False, None, None, (3,), False, False)
+    key, images, profile, elapsed = run.worker(task)
+    assert images['log1p_cell']['benchmark'][0]['uncached_samples_per_second'] > 0
+
+
+def test_zero_copy_interchange():
+    samples = cfv.ComplexPlaneSampler(numpy.complex64)(5, 5)
+    f = cfv.NumpyFunction('square', 'complex64')
+    assert f.from_numpy(samples) is samples
+    assert f.to_numpy(samples) is samples
+    assert f.from_numpy(samples, dtype=numpy.complex128).dtype == numpy.complex128
+    assert f.to_numpy(samples, dtype=numpy.complex128).dtype == numpy.complex128
+    with numpy.errstate(all='ignore'):
+        values = f.evaluate(samples, numpy.complex64)
+        assert numpy.array_equal(values, numpy.square(samples), equal_nan=True)
+
+
+def test_torch_zero_copy_interchange():
+    import pytest
+    torch = pytest.importorskip('torch')
+    samples = cfv.ComplexPlaneSampler(numpy.complex64)(5, 5)
+    f = cfv.TorchFunction('square', 'complex64', device='cpu')
+    tensor = f.from_numpy(samples)
+    assert tensor.data_ptr() == samples.ctypes.data
+    assert f.to_numpy(tensor).ctypes.data == samples.ctypes.data
+    # torch.from_numpy does not support negative strides
+    for view in [samples[::-1], samples[:, ::2], samples.T]:
+        assert numpy.array_equal(f.to_numpy(f.from_numpy(view)), view, equal_nan=True)
+    with numpy.errstate(all='ignore'):
+        values = f.evaluate(samples[::-1], numpy.complex64)
+        assert numpy.array_equal(values, f.to_numpy(torch.square(torch.tensor(samples[::-1].copy()))), equal_nan=True)
+
+
+def test_jax_zero_copy_interchange():
+    import pytest
+    pytest.importorskip('jax')
+    samples = cfv.ComplexPlaneSampler(numpy.complex64)(5, 5)
+    f = cfv.JaxNumpyFunction('square', 'complex64', device='cpu')
+    with f.context:
+        for view in [samples, samples[::-1], samples[:, ::2], samples.T]:
+            assert numpy.array_equal(f.to_numpy(f.from_numpy(view)), view, equal_nan=True)
+    with numpy.errstate(all='ignore'):
+        values = f.evaluate(samples[::-1], numpy.complex64)
+        assert values.shape == samples.shape
+
+
+def test_backends():
+    names = cfv.backends.backend_names()
+    assert {'mpmath', 'numpy', 'jax', 'torch', 'complex_math'} <= set(names)
+    assert cfv.backends.get_backend('numpy') is cfv.NumpyFunction
+    label, cls, version = cfv.backends.library('numpy')
+    assert (label, cls) == ('NumPy', cfv.NumpyFunction)
+    # versions from package metadata match the versions of imported modules
+    for name in ['numpy', 'mpmath', 'complex_math']:
+        cls = cfv.backends.get_backend(name)
+        assert cls.get_version() == cls.get_module_version()
+    try:
+        cfv.backends.get_backend('nosuchlib')
+    except KeyError as msg:
+        assert 'nosuchlib' in str(msg)
+    else:
+        assert 0  # expected KeyError
+
+
+def test_benchmark():
+    from complex_function_validation import run
+    f = cfv.NumpyFunction('exp', 'complex64')
+    results = cfv.benchmark.benchmark(f, sizes=(2, 5), warmup=1, repeat=3)
+    assert [r['samples'] for r in results] == [7 * 7, 13 * 13]
+    for r in results:
+        assert r['samples_per_second'] > 0
+        assert 0 < r['latency_p50'] <= r['latency_p90'] <= r['latency_p99']
+    assert '169 samples' in cfv.benchmark.summary(results)
+    results[0]['uncached_samples_per_second'] = 1e3
+    assert '1e+03 samples/s without jit cache' in cfv.benchmark.summary(results)
+
+    task = ('exp_task', 'exp', 'complex64', [('exp_cell', cfv.NumpyFunction, 'cpu')], ('benchmark',),
+            4, 4, 13, 13, None, True, False, None, None, (3,), False, False)
+    key, images, profile, elapsed = run.worker(task)
+    benchmark = images['exp_cell']['benchmark']
+    assert benchmark[0]['samples'] == 9 * 9
+    stats = dict(total=10, matches=10, inaccuracies=0, mismatches=0, ulp_max=0, ulp_p99=0)
+    assert ' M/s, ' in run.rating_cell(stats, 'exp.txt', benchmark=benchmark)
+
+
+def test_profiling(tmp_path):
+    from complex_function_validation import profiling, run
+    assert profiling.phase('sampling') is profiling.phase('comparison')  # disabled
+
+    profile = profiling.enable()
+    try:
+        with profiling.phase('sampling'):
+            samples = cfv.ComplexPlaneSampler(numpy.complex64)(3, 3)
+        with profiling.phase('sampling'):
+            pass
+        profiling.count('samples', samples.size)
+    finally:
+        assert profiling.disable() is profile
+    assert profile.phases['sampling'][0] == 2
+    assert profile.counters == dict(samples=81)
+    state = profile.dump()
+    merged = profiling.Profile.load(state).merge(profile)
+    assert merged.dump()['phases']['sampling']['calls'] == 4
+    assert merged.counters == dict(samples=162)
+
+    task = ('sqrt_task', 'sqrt', 'complex64', [('sqrt_cell', cfv.NumpyFunction, 'cpu')], ('stats', 'report'),
+            4, 4, 13, 13, None, True, False, None, None, None, True, False)
+    key, images, profile, elapsed = run.worker(task)
+    phases = profile['phases']
+    for phase in ['sampling', 'reference evaluate', 'target evaluate', 'comparison', 'clustering', 'dump']:
+        assert phases[phase]['calls'] > 0, phase
+    assert profiling.phase('x') is profiling.phase('y')
+
+    # profiles of functions that were not run are kept
+    import json
+    run.write_profile(str(tmp_path), dict(sqrt=profiling.Profile.load(profile), exp=merged))
+    run.write_profile(str(tmp_path), dict(exp=profiling.Profile()))
+    with open(tmp_path / 'profile.json') as fd:
+        state = json.load(fd)
+    assert state['sqrt'] == profile
+    assert state['exp'] == profiling.Profile().dump()
+
+
+def test_refine_plane():
+    from complex_function_validation.adaptive import refine_plane, code_classes
+    ref = cfv.NumpyFunction('log1p', 'complex128')
+    f = cfv.NumpyFunction('log1p', 'complex64')
+    samples = cfv.ComplexPlaneSampler(numpy.complex64)(100, 100)
+    with numpy.errstate(all='ignore'):
+        dense = cfv.compare_arrays(ref.evaluate(samples, numpy.complex64), f.evaluate(samples, numpy.complex64))
+        plane = refine_plane(ref, f, 100, depth=4)
+    assert plane.codes.shape == dense.shape
+    assert numpy.array_equal(plane.codes[plane.evaluated], dense[plane.evaluated])
+    assert plane.evaluations == plane.evaluated.sum() < dense.size // 5
+    table = code_classes(('=c~', '123456789ABCDEF', 'xXINM'))
+    assert (table[plane.codes] == table[dense]).mean() > 0.98
+    assert 'Statistics:' in str(plane.report())
+
+    with numpy.errstate(all='ignore'):
+        limited = refine_plane(ref, f, 100, depth=4, max_evaluations=plane.evaluations // 2)
+    assert limited.evaluations <= plane.evaluations // 2
+    assert limited.codes.all()  # all codes are set
+
+
+def test_find_transitions():
+    from complex_function_validation.sweep import find_transitions, axis_samples, compare_samples
+    ref = cfv.NumpyFunction('log1p', 'complex128')
+    f = cfv.NumpyFunction('log1p', 'complex64')
+    start, stop = 0.39, 0.395
+    with numpy.errstate(all='ignore'):
+        transitions, evaluations = find_transitions(ref, f, start, stop)
+        bits = numpy.array([start, stop], dtype=numpy.float32).view(numpy.uint32).astype(numpy.int64)
+        samples = axis_samples(numpy.float32, bits[0], bits[1] + 1)
+        codes = compare_samples(ref, f, samples)[2]
+        reverse_transitions, _ = find_transitions(ref, f, stop, start)
+    assert transitions
+    assert evaluations < 200
+    matches = numpy.isin(codes, numpy.frombuffer(b'=c~', dtype=numpy.uint8))
+    index = numpy.flatnonzero(matches[1:] != matches[:-1])
+    dense = {(samples[i], samples[i + 1], chr(codes[i]), chr(codes[i + 1])) for i in index}
+    for transition in transitions:
+        assert transition in dense, transition
+    assert reverse_transitions == [(a, b, ca, cb) for b, a, cb, ca in reversed(transitions)]
+
+    try:
+        find_transitions(ref, f, -1.0, 1.0)
+    except ValueError as msg:
+        assert 'same sign' in str(msg)
+    else:
+        assert 0  # expected ValueError
+
+    # a zero end takes the sign of the other end
+    class NumpyFunction(cfv.NumpyFunction):
+        evaluated = []
+
+        def evaluate(self, np_samples, numpy_dtype, memo=None):
+            self.evaluated.append(np_samples.copy())
+            return super().evaluate(np_samples, numpy_dtype, memo=memo)
+
+    f = NumpyFunction('log1p', 'complex64')
+    with numpy.errstate(all='ignore'):
+        for start, stop in [(0.0, -1.0), (-0.0, 1.0)]:
+            del f.evaluated[:]
+            find_transitions(ref, f, start, stop)
+            samples = numpy.concatenate(f.evaluated)
+            assert (numpy.signbit(samples) == numpy.signbit(stop)).all()
+            assert (abs(samples) <= 1).all()